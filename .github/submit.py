@@ -1,9 +1,7 @@
-import yaml
+from snake.config import load_config
+from snake.test import test_all
 
-from snake.snake import test_all
-
-with open("snake/difficulties.yaml", "r") as f:
-    CONFIG = yaml.safe_load(f)
+CONFIG = load_config()
 
 DIFFICULTIES = CONFIG["difficulties"]
 
@@ -1,8 +1,8 @@
 from collections import deque
 from snake.logic import GameState, Turn, Snake, Direction
 
-from snake.logic import DIRECTIONS
-from examples.smartAI import smartAI as enemyAI
+from snake.accel import grid, nearest_target
+from snake.enemies import tableAI as enemyAI
 
 
 def myAI(state: GameState) -> Turn:
@@ -135,17 +135,19 @@ def getDistanceToNearestFood(state):
 
 def getDistanceToNearestTarget(state, targets):
 
-    x, y = state.snake.head
+    width = state.width
 
-    minimumDistancesToCellsInBodies = {}
+    minimumDistancesToCellsInBodies = grid(width * state.height)
 
     minimumDistanceToHead = len(state.snake.body)
 
     if minimumDistanceToHead % 2 != 0:
         minimumDistanceToHead += 1
 
-    for index, position in enumerate(state.snake.body):
-        minimumDistancesToCellsInBodies[position] = minimumDistanceToHead - index
+    for index, (x, y) in enumerate(state.snake.body):
+        minimumDistancesToCellsInBodies[y * width + x] = minimumDistanceToHead - index
+
+    x, y = state.snake.head
 
     for enemy in state.enemies:
         if enemy.isAlive:
@@ -156,71 +158,20 @@ def getDistanceToNearestTarget(state, targets):
             if minimumDistanceToHead % 2 != (abs(x - enemyX) + abs(y - enemyY)) % 2:
                 minimumDistanceToHead += 1
 
-            for index, position in enumerate(enemy.body):
-                minimumDistancesToCellsInBodies[position] = minimumDistanceToHead - index
-
-    priorityQueue = deque()
-    insertIntoPriorityQueueForDistanceFinding(
-        priorityQueue,
-        (state.snake.head, minimumDistancesToCellsInBodies[state.snake.head])
+            for index, (bodyX, bodyY) in enumerate(enemy.body):
+                minimumDistancesToCellsInBodies[bodyY * width + bodyX] = minimumDistanceToHead - index
+
+    # the search itself runs in snake.accel, compiled when numba is installed
+    return nearest_target(
+        width,
+        state.height,
+        y * width + x,
+        state.snake.direction,
+        minimumDistancesToCellsInBodies,
+        grid(width * state.height, (wallY * width + wallX for wallX, wallY in state.walls)),
+        grid(width * state.height, (targetY * width + targetX for targetX, targetY in targets))
     )
 
-    visited = {state.snake.head}
-
-    for turn in Turn:
-        xOffset, yOffset = DIRECTIONS[(state.snake.direction + turn.value) % 4]
-        newX, newY = x + xOffset, y + yOffset
-        if not (0 <= newX < state.width and 0 <= newY < state.height):
-            continue
-        newPosition = (newX, newY)
-        if newPosition in state.walls:
-            continue
-    
-        newDistance = 1
-
-        if newPosition in minimumDistancesToCellsInBodies:
-            newDistance = minimumDistancesToCellsInBodies[newPosition]
-
-        insertIntoPriorityQueueForDistanceFinding(
-            priorityQueue,
-            (newPosition, newDistance)
-        )
-
-        visited.add(newPosition)
-
-    while priorityQueue:
-
-        position, distance = priorityQueue.popleft()
-
-        if position in targets:
-            return distance
-
-        x, y = position
-        
-        for xOffset, yOffset in DIRECTIONS:
-            newX, newY = x + xOffset, y + yOffset
-            if not (0 <= newX < state.width and 0 <= newY < state.height):
-                continue
-            newPosition = (newX, newY)
-            if newPosition in state.walls or newPosition in visited:
-                continue
-
-            newDistance = distance + 1
-
-            if newPosition in minimumDistancesToCellsInBodies:
-                minimumDistance = minimumDistancesToCellsInBodies[newPosition]
-                if newDistance < minimumDistance:
-                    newDistance = minimumDistance
-
-            insertIntoPriorityQueueForDistanceFinding(
-                priorityQueue,
-                (newPosition, newDistance)
-            )
-
-            visited.add(newPosition)
-
-    return None
-
 
 def insertIntoPriorityQueueForFoodFinding(priorityQueue, newElement):
 
@@ -253,19 +204,6 @@ def insertIntoPriorityQueueForTailFinding(priorityQueue, newElement):
     insertIntoPriorityQueue(priorityQueue, newElement, compare)
 
 
-def insertIntoPriorityQueueForDistanceFinding(priorityQueue, newElement):
-
-    def compare(lhs, rhs):
-
-        _, lhDistance = lhs
-
-        _, rhDistance = rhs
-
-        return -1 if lhDistance < rhDistance else 0 if lhDistance == rhDistance else 1
-
-    insertIntoPriorityQueue(priorityQueue, newElement, compare)
-
-
 def insertIntoPriorityQueue(priorityQueue, newElement, compare):
 
     for index, element in enumerate(priorityQueue):
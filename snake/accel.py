@@ -0,0 +1,145 @@
+import os
+from array import array
+
+# optional native-speed kernels for the flood fills AIs spend most of their time in
+#
+# with numba installed (pip install -e ".[accel]") they're compiled on first
+# use and work on numpy arrays; without it the same code runs as plain python
+# on arrays, slower but with identical results. boards are flattened to
+# cell = y * width + x and built with grid()
+
+try:
+    if os.environ.get("SNAKE_NO_JIT"):
+        raise ImportError("disabled by SNAKE_NO_JIT")
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
+JIT = njit is not None
+
+# DIRECTIONS from snake.logic split into x and y offsets, as numba wants flat tuples
+_DX = (0, 1, 0, -1)
+_DY = (-1, 0, 1, 0)
+
+
+def grid(size, cells=(), value=1):
+    """
+    A flat board of ints, zero apart from value at the given cells.
+
+    An array.array, so setting cells from python stays cheap and the compiled
+    kernels can read it without a copy.
+
+    Args:
+        size: Number of cells (width * height)
+        cells: Flat indices to set
+        value: What to set them to
+    """
+    board = array("i", bytes(4 * size))
+    for cell in cells:
+        board[cell] = value
+    return board
+
+
+def _nearest_target(width, height, head, direction, bounds, walls, targets, dist, below, top):
+    # a bucket queue of stacks: popping the top of the lowest bucket gives the
+    # closest cell, the latest pushed first among equals, just as inserting
+    # each cell in front of the first one at least as far does
+    distance = bounds[head]
+    dist[head] = distance
+    below[head] = top[distance]
+    top[distance] = head
+
+    x, y = head % width, head // width
+    for turn in (-1, 0, 1):
+        nx, ny = x + _DX[(direction + turn) % 4], y + _DY[(direction + turn) % 4]
+        if not (0 <= nx < width and 0 <= ny < height):
+            continue
+        cell = ny * width + nx
+        if walls[cell]:
+            continue
+        distance = bounds[cell] if bounds[cell] else 1
+        dist[cell] = distance
+        below[cell] = top[distance]
+        top[distance] = cell
+
+    distance = 0
+    while True:
+        while distance < len(top) and top[distance] < 0:
+            distance += 1
+        if distance == len(top):
+            return -1
+
+        cell = top[distance]
+        top[distance] = below[cell]
+        if targets[cell]:
+            return distance
+
+        x, y = cell % width, cell // width
+        for i in range(4):
+            nx, ny = x + _DX[i], y + _DY[i]
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            near = ny * width + nx
+            if walls[near] or dist[near]:
+                continue
+            # every push is further than the cell just popped, so the scan
+            # for the lowest bucket never has to go back down
+            pushed = max(distance + 1, bounds[near])
+            dist[near] = pushed
+            below[near] = top[pushed]
+            top[pushed] = near
+
+
+def _search(width, height, head, direction, bounds, walls, targets):
+    # a bound is at most a snake filling the board plus two, and distances
+    # can't pass the largest bound plus a trip across the board
+    size = width * height
+    dist = [0] * size
+    below = [0] * size
+    top = [-1] * (2 * size + 4)
+    return _nearest_target(
+        width, height, head, direction, bounds, walls, targets, dist, below, top
+    )
+
+
+if JIT:
+    _nearest_target = njit(cache=True)(_nearest_target)
+
+    @njit(cache=True)
+    def _search(width, height, head, direction, bounds, walls, targets):
+        size = width * height
+        dist = np.zeros(size, dtype=np.int32)
+        below = np.empty(size, dtype=np.int32)
+        top = np.full(2 * size + 4, -1, dtype=np.int32)
+        return _nearest_target(
+            width, height, head, direction, bounds, walls, targets, dist, below, top
+        )
+
+
+def nearest_target(width, height, head, direction, bounds, walls, targets):
+    """
+    Distance from the head to the closest target, or None if none can be reached.
+
+    Floods out from the head (first only into the cells the snake can turn
+    into), where reaching a cell takes one more move than reaching the cell
+    it was reached from, but never fewer than its bound. Cells are expanded
+    closest first, ties going to whichever was reached last.
+
+    Args:
+        width: Width of the board
+        height: Height of the board
+        head: Flat index of the snake's head
+        direction: The snake's direction, indexing DIRECTIONS
+        bounds: grid of the fewest moves before each cell is free, 0 if it already is
+        walls: grid that is nonzero on walls
+        targets: grid that is nonzero on the cells being looked for
+    """
+    if JIT:
+        bounds = np.frombuffer(bounds, dtype=np.int32)
+        walls = np.frombuffer(walls, dtype=np.int32)
+        targets = np.frombuffer(targets, dtype=np.int32)
+
+    distance = _search(width, height, head, direction, bounds, walls, targets)
+    return None if distance < 0 else int(distance)
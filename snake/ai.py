@@ -0,0 +1,27 @@
+import importlib
+from functools import lru_cache
+
+DEFAULT_AI = "myAI:myAI"
+DEFAULT_ENEMY_AI = "examples.smartAI:smartAI"
+
+
+@lru_cache(maxsize=None)
+def load_ai(spec):
+    """
+    Load an AI function from a "module:function" spec, e.g. "examples.smartAI:smartAI".
+
+    Loaded functions are cached, so each process imports a given AI only once.
+    """
+    module_name, sep, function_name = spec.partition(":")
+    if not sep or not module_name or not function_name:
+        raise ValueError(f"AI must be given as module:function, got {spec!r}")
+
+    module = importlib.import_module(module_name)
+    try:
+        ai = getattr(module, function_name)
+    except AttributeError:
+        raise ValueError(f"{module_name} has no function {function_name!r}") from None
+
+    if not callable(ai):
+        raise ValueError(f"{spec} is not callable")
+    return ai
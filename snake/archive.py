@@ -0,0 +1,260 @@
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from snake.replay import advance
+
+# what a cell holds in a tick's board
+EMPTY, HEAD, BODY, ENEMY_HEAD, ENEMY_BODY, FOOD, WALL = range(7)
+
+# the action of a tick the player didn't move in (it was already dead)
+NO_ACTION = 255
+
+MAGIC = b"SNKA"
+VERSION = 1
+
+# magic, version, width, height, padded so records start 64 bytes in
+_HEADER = struct.Struct("<4sBHH")
+HEADER_SIZE = 64
+
+TICKS_FILE = "ticks.bin"
+INDEX_FILE = "index.bin"
+
+# one row per game in the index, its ticks being records[start : start + count]
+GAME_DTYPE = np.dtype(
+    [
+        ("start", "<u8"),
+        ("count", "<u4"),
+        ("seed", "<u8"),
+        ("score", "<i4"),
+        ("moves", "<u4"),
+        ("num_enemies", "<u2"),
+        ("num_food", "<u2"),
+        ("max_moves", "<u4"),
+    ]
+)
+
+
+def tick_dtype(width, height):
+    """
+    The fixed-width record of one tick on a board, as seen before the player moves.
+
+    board holds a cell code per cell and age each body segment's place along
+    its snake (1 for heads, 0 off bodies), so bodies can be traced head to tail.
+    action is the player's turn as turn.value + 1, indexing snake.replay.TURNS.
+    """
+    age = "u1" if width * height < 256 else "<u2"
+    return np.dtype(
+        [
+            ("game", "<u4"),
+            ("tick", "<u4"),
+            ("score", "<i4"),
+            ("direction", "u1"),
+            ("action", "u1"),
+            ("board", "u1", (height, width)),
+            ("age", age, (height, width)),
+        ]
+    )
+
+
+def draw(game, board, age):
+    """Draws a SnakeGame into a tick record's (zeroed) board and age planes"""
+    for x, y in game.walls:
+        board[y, x] = WALL
+    for x, y in game.food:
+        board[y, x] = FOOD
+
+    # a dead player's body stays on the board, as it does in the engine
+    for snake in game.snakes:
+        if snake is not game.snakes[0] and not snake.isAlive:
+            continue
+        head, body = (HEAD, BODY) if snake is game.snakes[0] else (ENEMY_HEAD, ENEMY_BODY)
+        for i, (x, y) in enumerate(snake.body):
+            board[y, x] = body
+            age[y, x] = i + 1
+        x, y = snake.head
+        board[y, x] = head
+
+
+def replay_ticks(replay, game_number=0):
+    """
+    Re-simulates a replay into tick records, the last one after the game ends.
+
+    Returns:
+        The records and the finished SnakeGame
+    """
+    game = replay.new_game()
+    turns = replay.turns
+
+    # the player takes at most one turn a tick, so there can't be more ticks
+    # than its turns or the game's max_moves (turns holds the enemies' too)
+    size = min(len(turns), replay.max_moves) + 1
+    records = np.zeros(size, tick_dtype(game.width, game.height))
+    boards, ages, actions = records["board"], records["age"], records["action"]
+    t = k = 0
+    while True:
+        records["tick"][t] = game.moves
+        records["score"][t] = game.snakes[0].score
+        records["direction"][t] = game.snakes[0].direction
+        draw(game, boards[t], ages[t])
+
+        # the player moves first in every tick it's alive for
+        if game.game_over or k >= len(turns) or not game.snakes[0].isAlive:
+            actions[t] = NO_ACTION
+            break
+        actions[t] = turns[k]
+        k = advance(game, turns, k)
+        t += 1
+
+    records = records[: t + 1]
+    records["game"] = game_number
+    return records, game
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        magic, version, width, height = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a tick archive")
+    if version != VERSION:
+        raise ValueError(f"unsupported tick archive version {version}")
+    return width, height
+
+
+def _map(path, dtype, offset, count):
+    # numpy can't map an empty range
+    if count == 0:
+        return np.zeros(0, dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+class TickArchiveWriter:
+    def __init__(self, path):
+        """
+        Appends games to a tick archive, creating it on the first game.
+
+        An archive is a directory of two files: ticks.bin, a header then one
+        fixed-width record per tick (see tick_dtype), and index.bin, one
+        GAME_DTYPE row per game. Ticks are written before their index row, so
+        a reader never sees a game that isn't all there. Every game in an
+        archive has to be played on the same size of board.
+
+        Args:
+            path: The archive's directory
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.ticks_path = self.path / TICKS_FILE
+        self.index_path = self.path / INDEX_FILE
+
+        self.width = self.height = None
+        self.num_games = 0
+        self.num_ticks = 0
+        if self.ticks_path.exists():
+            self.width, self.height = _read_header(self.ticks_path)
+            self.index_path.touch()
+
+            # drops whatever a writer that was cut short left half written:
+            # part of an index row, or ticks that never got their row
+            self.num_games = self.index_path.stat().st_size // GAME_DTYPE.itemsize
+            os.truncate(self.index_path, self.num_games * GAME_DTYPE.itemsize)
+            if self.num_games:
+                last = _map(self.index_path, GAME_DTYPE, 0, self.num_games)[-1]
+                self.num_ticks = int(last["start"] + last["count"])
+            dtype = tick_dtype(self.width, self.height)
+            os.truncate(self.ticks_path, HEADER_SIZE + self.num_ticks * dtype.itemsize)
+
+    def append(self, replay):
+        """Adds a recorded game, returning its number in the archive"""
+        if self.width is None:
+            self.width, self.height = replay.width, replay.height
+            header = _HEADER.pack(MAGIC, VERSION, self.width, self.height)
+            with open(self.ticks_path, "wb") as f:
+                f.write(header.ljust(HEADER_SIZE, b"\0"))
+        elif (replay.width, replay.height) != (self.width, self.height):
+            raise ValueError(
+                f"this archive holds {self.width}x{self.height} games, "
+                f"not {replay.width}x{replay.height}"
+            )
+
+        records, game = replay_ticks(replay, self.num_games)
+        row = np.zeros((), GAME_DTYPE)
+        row["start"] = self.num_ticks
+        row["count"] = len(records)
+        row["seed"] = replay.seed
+        row["score"] = game.snakes[0].score
+        row["moves"] = game.moves
+        row["num_enemies"] = replay.num_enemies
+        row["num_food"] = replay.num_food
+        row["max_moves"] = replay.max_moves
+
+        with open(self.ticks_path, "ab") as f:
+            f.write(records.tobytes())
+        with open(self.index_path, "ab") as f:
+            f.write(row.tobytes())
+
+        self.num_ticks += len(records)
+        self.num_games += 1
+        return self.num_games - 1
+
+
+class TickArchive:
+    def __init__(self, path):
+        """
+        Read-only, memory-mapped view of a tick archive.
+
+        Nothing is read until it's used: `ticks` and `games` are NumPy views
+        straight onto the files, so slicing a game or sampling ticks only pages
+        in the records touched. Games appended after opening aren't seen.
+
+        Args:
+            path: The archive's directory
+        """
+        self.path = Path(path)
+        self.width, self.height = _read_header(self.path / TICKS_FILE)
+        self.dtype = tick_dtype(self.width, self.height)
+
+        index_path = self.path / INDEX_FILE
+        num_games = index_path.stat().st_size // GAME_DTYPE.itemsize if index_path.exists() else 0
+        self.games = _map(index_path, GAME_DTYPE, 0, num_games)
+
+        num_ticks = int(self.games[-1]["start"] + self.games[-1]["count"]) if num_games else 0
+        self.ticks = _map(self.path / TICKS_FILE, self.dtype, HEADER_SIZE, num_ticks)
+
+    def __len__(self):
+        return len(self.games)
+
+    def game(self, i):
+        """The ticks of one game, as a view"""
+        row = self.games[i]
+        start = int(row["start"])
+        return self.ticks[start : start + int(row["count"])]
+
+    def sample(self, n, rng=None, moves_only=True):
+        """
+        Picks n ticks at random (with replacement), copied out in archive order.
+
+        Args:
+            n: Number of ticks
+            rng: numpy Generator to draw from
+            moves_only: Only pick ticks the player moved in, i.e. that have an action
+        """
+        if not len(self.ticks):
+            raise ValueError("the archive is empty")
+        rng = rng if rng is not None else np.random.default_rng()
+        if not moves_only:
+            return self.ticks[np.sort(rng.integers(len(self.ticks), size=n))]
+
+        # only each game's last tick has no action, so a few rounds of
+        # rejection always fill the sample (in the order drawn, so cutting it
+        # to n doesn't favour the start of the archive)
+        picks = np.empty(0, np.int64)
+        for _ in range(100):
+            if len(picks) >= n:
+                return self.ticks[np.sort(picks[:n])]
+            candidates = rng.integers(len(self.ticks), size=2 * (n - len(picks)))
+            moved = self.ticks["action"][candidates] != NO_ACTION
+            picks = np.concatenate([picks, candidates[moved]])
+        raise ValueError("the archive has no ticks with an action")
@@ -0,0 +1,61 @@
+import random
+import time
+
+from snake.ai import DEFAULT_ENEMY_AI, load_ai
+from snake.enemies import enemy_policy
+from snake.logic import SnakeGame
+
+# (board size, enemies) from the shipped boards up to stress_max
+SCALES = [(15, 5), (32, 20), (64, 50), (128, 100), (256, 200)]
+
+
+def bench_scale(size, num_enemies, ticks, ai, enemy_ai):
+    """
+    Plays `ticks` ticks on a square board, starting new games as they finish.
+
+    Returns:
+        Seconds spent in the engine and in the AIs (including building their states)
+    """
+    enemy_turn = enemy_policy(enemy_ai)
+    game = SnakeGame(
+        width=size,
+        height=size,
+        num_enemies=num_enemies,
+        num_food=max(15, size * size // 128),
+        max_moves=ticks,
+        seed=random.getrandbits(32),
+    )
+    clock = time.perf_counter
+    engine = thinking = 0.0
+
+    for _ in range(ticks):
+        if game.game_over:
+            start = clock()
+            game.reset(random.getrandbits(32))
+            engine += clock() - start
+
+        for i in range(len(game.snakes)):
+            if game.snakes[i].isAlive:
+                start = clock()
+                turn = ai(game.getGameState(i)) if i == 0 else enemy_turn(game, i)
+                end = clock()
+                game.move_snake(i, turn)
+                engine += clock() - end
+                thinking += end - start
+
+    return engine, thinking
+
+
+def bench(ticks=200, ai=DEFAULT_ENEMY_AI, enemy_ai=DEFAULT_ENEMY_AI, scales=SCALES):
+    """Prints the time per tick as the board and the number of snakes grow"""
+    ai = load_ai(ai)
+    enemy_ai = load_ai(enemy_ai)
+
+    print(f"{'board':>9} {'snakes':>7} {'engine ms/tick':>15} {'AI ms/tick':>11} {'total':>8}")
+    for size, num_enemies in scales:
+        engine, thinking = bench_scale(size, num_enemies, ticks, ai, enemy_ai)
+        engine, thinking = 1000 * engine / ticks, 1000 * thinking / ticks
+        print(
+            f"{f'{size}x{size}':>9} {num_enemies + 1:>7} {engine:>15.3f} "
+            f"{thinking:>11.3f} {engine + thinking:>8.3f}"
+        )
@@ -0,0 +1,237 @@
+import hashlib
+import inspect
+import json
+import sqlite3
+import sys
+import sysconfig
+import time
+from collections import defaultdict
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from types import ModuleType
+
+from snake.ai import load_ai
+from snake.config import cache_dir
+from snake.pool import GameResult
+from snake.replay import Replay
+
+# bump when what's stored (or how games are played) changes in a way the
+# hashed sources below don't capture
+CACHE_VERSION = 1
+
+# the engine sources every result depends on
+ENGINE_FILES = ["logic.py", "enemies.py", "pool.py", "codec.py", "remote.py"]
+
+_PATHS = sysconfig.get_paths()
+_STDLIB_PATHS = {str(Path(_PATHS[name]).resolve()) for name in ("stdlib", "platstdlib")}
+_SITE_PATHS = {str(Path(_PATHS[name]).resolve()) for name in ("purelib", "platlib")}
+
+
+def _is_stdlib(name, path):
+    if hasattr(sys, "stdlib_module_names"):
+        return name in sys.stdlib_module_names
+    # before 3.10, goes by where it lives, site-packages being inside the stdlib
+    inside = lambda roots: any(path.startswith(root) for root in roots)
+    return inside(_STDLIB_PATHS) and not inside(_SITE_PATHS)
+
+
+@lru_cache(maxsize=None)
+def _third_party_packages():
+    # top-level names installed by any distribution other than the one this
+    # engine (and with it myAI) came from, so a regular install of the project
+    # still counts as the project
+    owners = defaultdict(set)
+    for dist in metadata.distributions():
+        name = dist.metadata["Name"]
+        top_level = dist.read_text("top_level.txt")
+        if top_level:
+            packages = top_level.split()
+        else:
+            # the first part of every installed path, metadata directories
+            # included, which can't clash with a module name
+            files = dist.files or ()
+            packages = {f.parts[0].removesuffix(".py") for f in files if f.parts}
+        for package in packages:
+            owners[package].add(name)
+
+    project = owners.get(__name__.partition(".")[0], set())
+    return {package for package, names in owners.items() if names - project}
+
+
+def _is_project_module(module):
+    # stdlib and third-party packages aren't part of anyone's AI, wherever
+    # they're installed; everything else is, site-packages or not
+    path = getattr(module, "__file__", None)
+    if not path:
+        return False
+    top = module.__name__.partition(".")[0]
+    if _is_stdlib(top, str(Path(path).resolve())):
+        return False
+    return top not in _third_party_packages()
+
+
+def _referenced_modules(module):
+    for value in vars(module).values():
+        if isinstance(value, ModuleType):
+            yield value
+        else:
+            referenced = inspect.getmodule(value)
+            if referenced is not None:
+                yield referenced
+
+
+@lru_cache(maxsize=None)
+def ai_fingerprint(spec):
+    """
+    Hashes the source of an AI and of every project module it uses.
+
+    Follows the AI module's globals, so myAI's `from snake.enemies import
+    tableAI` pulls snake.enemies' source in too.
+    """
+    ai = load_ai(spec)
+    seen = {}
+    pending = [inspect.getmodule(ai)]
+    while pending:
+        module = pending.pop()
+        if module is None or module.__name__ in seen or not _is_project_module(module):
+            continue
+        seen[module.__name__] = Path(module.__file__).read_bytes()
+        pending.extend(_referenced_modules(module))
+
+    digest = hashlib.sha256(spec.encode())
+    for name in sorted(seen):
+        digest.update(name.encode())
+        digest.update(hashlib.sha256(seen[name]).digest())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def engine_fingerprint():
+    root = Path(__file__).resolve().parent
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for name in ENGINE_FILES:
+        digest.update((root / name).read_bytes())
+    return digest.hexdigest()
+
+
+def task_key(task):
+    """The content address of a game: everything its result depends on"""
+    parts = [
+        engine_fingerprint(),
+        ai_fingerprint(task.ai),
+        ai_fingerprint(task.enemy_ai),
+        json.dumps(task.cfg, sort_keys=True),
+        task.seed,
+        task.timeout,
+    ]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path=None, max_entries=200_000):
+        """
+        On-disk cache of per-game results, keyed by task_key.
+
+        Entries carry the game's replay, so cached games can still be recorded.
+        Once there are more than max_entries the least recently used are evicted.
+
+        Args:
+            path: SQLite file, defaults to results.sqlite in the cache directory
+            max_entries: Most games to keep
+        """
+        path = Path(path) if path is not None else cache_dir() / "results.sqlite"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, result TEXT NOT NULL, replay BLOB NOT NULL,"
+            " used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+
+    def get(self, task):
+        """Gets a task's cached GameResult, or None"""
+        key = task_key(task)
+        row = self.db.execute(
+            "SELECT result, replay FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self.db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        fields = json.loads(row[0])
+        return GameResult(
+            seed=task.seed,
+            score=fields["score"],
+            moves=fields["moves"],
+            seconds=fields["seconds"],
+            enemy_scores=tuple(fields["enemy_scores"]),
+            replay=Replay.from_bytes(row[1])[0] if task.record else None,
+            timeouts=fields["timeouts"],
+            ai_seconds=fields["ai_seconds"],
+        )
+
+    def put(self, task, result):
+        """Stores a result, which must have been played with its replay recorded"""
+        fields = {
+            "score": result.score,
+            "moves": result.moves,
+            "seconds": result.seconds,
+            "enemy_scores": list(result.enemy_scores),
+            "timeouts": result.timeouts,
+            "ai_seconds": result.ai_seconds,
+        }
+        self.db.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+            (task_key(task), json.dumps(fields), result.replay.to_bytes(), time.time()),
+        )
+
+    def evict(self):
+        """Drops the least recently used games beyond max_entries"""
+        (count,) = self.db.execute("SELECT COUNT(*) FROM results").fetchone()
+        if count > self.max_entries:
+            self.db.execute(
+                "DELETE FROM results WHERE key IN"
+                " (SELECT key FROM results ORDER BY used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def play(self, pool, tasks):
+        """
+        Plays tasks through a GamePool, taking results from the cache where it can.
+
+        Yields results in task order; only the missing games are played. Games
+        with a timeout depend on how fast the machine was at the time, so they
+        are always played and never stored.
+        """
+        tasks = list(tasks)
+        results = [self.get(task) if task.timeout is None else None for task in tasks]
+        missing = [i for i, result in enumerate(results) if result is None]
+
+        # plays the misses with replays on, so they can be cached whole
+        played = iter(pool.play([tasks[i]._replace(record=True) for i in missing]))
+
+        try:
+            for task, result in zip(tasks, results):
+                if result is None:
+                    result = next(played)
+                    if task.timeout is None:
+                        self.put(task, result)
+                    if not task.record:
+                        result = result._replace(replay=None)
+                yield result
+        finally:
+            self.evict()
+            self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
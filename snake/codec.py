@@ -0,0 +1,285 @@
+import random
+import struct
+import sys
+from functools import lru_cache
+
+from snake.logic import GameState, Snake, SnakeGame
+
+# a state is a flat run of little-endian int32s:
+#   width, height, score, num_snakes,
+#   per snake (player first): id, direction, isAlive, score, length, cells...
+#   num_food, cells..., num_walls, cells...
+# cells are packed as y * width + x, like snake.frame
+_INT = struct.Struct("<i")
+
+
+def state_size(width, height, num_snakes):
+    """Bytes needed for any state of a board, whatever is on it"""
+    # every cell holds at most one body segment, food or wall (dead enemies are
+    # left out), plus the fixed fields
+    return _INT.size * (4 + 5 * num_snakes + 2 + width * height)
+
+
+def _snake_ints(snakes, width):
+    ints = []
+    for snake in snakes:
+        ints += (snake.id, snake.direction, snake.isAlive, snake.score, len(snake.body))
+        ints += [y * width + x for x, y in snake.body]
+    return ints
+
+
+def _cell_ints(cells, width):
+    return [len(cells)] + [y * width + x for x, y in cells]
+
+
+def _state_ints(state):
+    width = state.width
+    snakes = [state.snake] + state.enemies
+    return (
+        [width, state.height, state.score, len(snakes)]
+        + _snake_ints(snakes, width)
+        + _cell_ints(state.food, width)
+        + _cell_ints(state.walls, width)
+    )
+
+
+def encode_state(state, buf, offset=0):
+    """
+    Writes a GameState into a buffer, e.g. shared memory.
+
+    Returns:
+        The offset just past the encoded state
+    """
+    ints = _state_ints(state)
+    struct.pack_into(f"<{len(ints)}i", buf, offset, *ints)
+    return offset + _INT.size * len(ints)
+
+
+@lru_cache(maxsize=8)
+def _cell_table(width, height):
+    # the (x, y) tuple of every packed cell, so decoding is a lookup per cell
+    return [(x, y) for y in range(height) for x in range(width)]
+
+
+class _Reader:
+    # reads runs of int32s (and the odd other field) from a buffer in order
+    def __init__(self, buf, offset):
+        self.buf = buf
+        self.pos = self._offset = offset
+
+        # on little-endian machines the int32s are read straight off a view
+        self._view = None
+        if sys.byteorder == "little":
+            view = memoryview(buf)[offset:]
+            self._view = view[: len(view) // _INT.size * _INT.size].cast("i")
+
+    def unpack(self, fmt):
+        values = struct.unpack_from(fmt, self.buf, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return values
+
+    def ints(self, count):
+        # only ints are read while the view is held, so it stays aligned
+        if self._view is None:
+            return self.unpack(f"<{count}i")
+        start = (self.pos - self._offset) // _INT.size
+        self.pos += _INT.size * count
+        return self._view[start : start + count].tolist()
+
+    def cells(self, table):
+        (count,) = self.ints(1)
+        return map(table.__getitem__, self.ints(count))
+
+    def release(self):
+        # shared memory can't be closed while a view of it is held
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+
+
+def _read_snakes(reader, count, table, reuse=()):
+    # reuses the given Snake objects (and their bodies) where there are enough
+    snakes = []
+    for k in range(count):
+        id, direction, isAlive, score, length = reader.ints(5)
+        if k < len(reuse):
+            snake = reuse[k]
+            snake.id = id
+            snake.direction = direction
+            snake.body.clear()
+        else:
+            snake = Snake(0, 0, id=id, direction=direction)
+            snake.body.pop()
+        snake.isAlive = bool(isAlive)
+        snake.score = score
+        snake.body.extend(map(table.__getitem__, reader.ints(length)))
+        snakes.append(snake)
+    return snakes
+
+
+def _refill(target, cells):
+    # refills a set in place when there is one to reuse
+    if target is None:
+        return set(cells)
+    target.clear()
+    target.update(cells)
+    return target
+
+
+def decode_state(buf, offset=0, into=None):
+    """
+    Reads a GameState written by encode_state.
+
+    The AI gets fresh Snake objects and sets, so nothing it does to them can
+    reach the game being played. The sets are filled in the order the game's
+    iterate in, but being built anew they can still iterate differently.
+
+    Args:
+        buf: The buffer to read from
+        offset: Where the state starts in it
+        into: A GameState to overwrite instead of building a new one; its
+            snakes, bodies, sets and enemies list are refilled in place
+    """
+    reader = _Reader(buf, offset)
+    width, height, score, num_snakes = reader.ints(4)
+    table = _cell_table(width, height)
+
+    reuse = [into.snake] + into.enemies if into is not None else []
+    snakes = _read_snakes(reader, num_snakes, table, reuse)
+    food = _refill(into.food if into is not None else None, reader.cells(table))
+    walls = _refill(into.walls if into is not None else None, reader.cells(table))
+    reader.release()
+
+    if into is None:
+        return GameState(
+            width=width,
+            height=height,
+            snake=snakes[0],
+            enemies=snakes[1:],
+            food=food,
+            walls=walls,
+            score=score,
+        )
+
+    into.width = width
+    into.height = height
+    into.snake = snakes[0]
+    into.enemies[:] = snakes[1:]
+    into.score = score
+    return into
+
+
+# the blobs written by to_bytes() on GameState and SnakeGame: a header naming
+# what follows, then the int32 layout above (for games, followed by the
+# config, the generator's state and the recorded turns)
+MAGIC = b"SNKS"
+VERSION = 1
+STATE, GAME = 0, 1
+
+# magic, version, kind
+_HEADER = struct.Struct("<4sBB")
+_KINDS = {STATE: "a GameState", GAME: "a SnakeGame"}
+
+# seed, then the Mersenne Twister state: 624 words and a position
+_RNG = struct.Struct("<Q625I")
+
+
+def _check_header(buf, offset, kind):
+    magic, version, found = _HEADER.unpack_from(buf, offset)
+    if magic != MAGIC:
+        raise ValueError("not an encoded snake state")
+    if version != VERSION:
+        raise ValueError(f"unsupported encoding version {version}")
+    if found != kind:
+        raise ValueError(f"expected {_KINDS[kind]}, got {_KINDS.get(found, f'kind {found}')}")
+    return offset + _HEADER.size
+
+
+def state_to_bytes(state):
+    """Encodes a GameState as a versioned blob, see GameState.to_bytes"""
+    ints = _state_ints(state)
+    return _HEADER.pack(MAGIC, VERSION, STATE) + struct.pack(f"<{len(ints)}i", *ints)
+
+
+def state_from_bytes(data, offset=0, into=None):
+    """Decodes a blob from state_to_bytes, see GameState.from_bytes"""
+    return decode_state(data, _check_header(data, offset, STATE), into)
+
+
+def game_to_bytes(game):
+    """Encodes a whole SnakeGame as a versioned blob, see SnakeGame.to_bytes"""
+    width = game.width
+    ints = (
+        [width, game.height, game.num_enemies, game.num_food, game.max_moves]
+        + [game.moves, game.game_over, len(game.snakes)]
+        + _snake_ints(game.snakes, width)
+        + _cell_ints(game.food, width)
+        + _cell_ints(game.walls, width)
+        + _cell_ints(game.invalid_wall_cache, width)
+        + [len(game.turns)]
+    )
+
+    version, words, gauss = game.rng.getstate()
+    if version != 3:
+        raise ValueError(f"can't encode random generator state version {version}")
+
+    return b"".join(
+        [
+            _HEADER.pack(MAGIC, VERSION, GAME),
+            struct.pack(f"<{len(ints)}i", *ints),
+            bytes(game.turns),
+            _RNG.pack(game.seed, *words),
+            struct.pack("<?d", gauss is not None, gauss or 0.0),
+        ]
+    )
+
+
+def game_from_bytes(data, offset=0, into=None):
+    """Decodes a blob from game_to_bytes, see SnakeGame.from_bytes"""
+    reader = _Reader(data, _check_header(data, offset, GAME))
+    width, height, num_enemies, num_food, max_moves, moves, game_over, num_snakes = (
+        reader.ints(8)
+    )
+
+    if into is None:
+        game = SnakeGame.__new__(SnakeGame)
+        game.observer = None
+        game.rng = random.Random()
+        reuse = []
+    else:
+        game = into
+        # the observer's planes are allocated for one board size
+        if game.observer is not None and (game.width, game.height) != (width, height):
+            raise ValueError("can't decode into a game with an observer on another board size")
+        # a game with another number of snakes can't reuse them
+        reuse = game.snakes if len(game.snakes) == num_snakes else []
+
+    game.width = width
+    game.height = height
+    game.num_enemies = num_enemies
+    game.num_food = num_food
+    game.max_moves = max_moves
+    game.moves = moves
+    game.game_over = bool(game_over)
+    table = _cell_table(width, height)
+    game.snakes = _read_snakes(reader, num_snakes, table, reuse)
+    game.food = _refill(getattr(into, "food", None), reader.cells(table))
+    game.walls = _refill(getattr(into, "walls", None), reader.cells(table))
+    game.invalid_wall_cache = _refill(
+        getattr(into, "invalid_wall_cache", None), reader.cells(table)
+    )
+
+    (num_turns,) = reader.ints(1)
+    reader.release()
+    game.turns = bytearray(data[reader.pos : reader.pos + num_turns])
+    reader.pos += num_turns
+
+    seed, *words = reader.unpack(_RNG.format)
+    has_gauss, gauss = reader.unpack("<?d")
+    game.seed = seed
+    game.rng.setstate((3, tuple(words), gauss if has_gauss else None))
+
+    game.reindex()
+    if game.observer is not None:
+        game.observer.rebuild()
+    return game
@@ -0,0 +1,114 @@
+import math
+import random
+from statistics import NormalDist, mean, stdev
+
+from tqdm import tqdm
+
+from snake.pool import GamePool, GameTask
+
+
+def paired_interval(diffs, alpha):
+    """Normal confidence interval for the mean of paired differences"""
+    n = len(diffs)
+    centre = mean(diffs)
+    if n < 2:
+        return centre, -math.inf, math.inf
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+    half = z * stdev(diffs) / math.sqrt(n)
+    return centre, centre - half, centre + half
+
+
+def compare(
+    old,
+    new,
+    difficulty,
+    DIFFICULTIES,
+    max_games=1000,
+    batch=50,
+    alpha=0.05,
+    enemy_ai=None,
+    workers=1,
+    cache=None,
+):
+    """
+    A/B test two AIs by playing both on the same seeds.
+
+    Each seed gives one paired difference (new score - old score), so the luck
+    of the board cancels out, along with any AI's own luck from the random
+    module, which run_task seeds per game. After every batch the interval on
+    the mean difference is checked and the comparison stops once it excludes
+    zero. Checking repeatedly inflates false positives, so each look uses
+    alpha split evenly over every look that could happen (Bonferroni).
+
+    Args:
+        old: The baseline AI as "module:function"
+        new: The candidate AI as "module:function"
+        max_games: Most seeds to play, each played by both AIs
+        batch: Seeds played between looks
+        alpha: Chance of calling a difference that isn't there
+        enemy_ai: The enemies' AI, defaults to the usual one
+        workers: Worker processes to play games in
+        cache: ResultCache to take already played games from
+    """
+    if max_games < 1 or batch < 1:
+        raise ValueError("compare needs at least one game and a batch of at least one")
+
+    cfg = DIFFICULTIES[difficulty]
+    extra = {} if enemy_ai is None else {"enemy_ai": enemy_ai}
+    looks = math.ceil(max_games / batch)
+    look_alpha = alpha / looks
+
+    old_scores, new_scores, diffs = [], [], []
+    verdict = None
+    preload = (old, new) + tuple(extra.values())
+
+    with GamePool(workers, preload=preload) as pool:
+        with tqdm(total=max_games, desc=f"Comparing on {difficulty}", unit="seed") as pbar:
+            for look in range(1, looks + 1):
+                seeds = [
+                    random.getrandbits(32) for _ in range(min(batch, max_games - len(diffs)))
+                ]
+                # both AIs play each seed, interleaved so a batch finishes together
+                tasks = [
+                    GameTask(cfg, seed, ai=spec, **extra) for seed in seeds for spec in (old, new)
+                ]
+                results = iter(cache.play(pool, tasks) if cache is not None else pool.play(tasks))
+                for old_result, new_result in zip(results, results):
+                    old_scores.append(old_result.score)
+                    new_scores.append(new_result.score)
+                    diffs.append(new_result.score - old_result.score)
+                    pbar.update(1)
+
+                centre, low, high = paired_interval(diffs, look_alpha)
+                pbar.set_postfix({"diff": f"{centre:+.2f}", "ci": f"[{low:+.2f}, {high:+.2f}]"})
+                if low > 0 or high < 0:
+                    verdict = "better" if low > 0 else "worse"
+                    break
+
+    n = len(diffs)
+    centre, low, high = paired_interval(diffs, look_alpha)
+    confidence = 100 * (1 - look_alpha)
+
+    print(f"\nComparison on {difficulty} ({n} seeds, look {look} of {looks})")
+    print("=" * 60)
+    print(f"  old  {old:<36} {mean(old_scores):>8.2f}")
+    print(f"  new  {new:<36} {mean(new_scores):>8.2f}")
+    print(f"  difference {centre:+.2f}, {confidence:.2f}% interval [{low:+.2f}, {high:+.2f}]")
+
+    # how much pairing helped: the unpaired difference has both AIs' variance
+    if n >= 2:
+        paired = stdev(diffs)
+        unpaired = math.sqrt(stdev(old_scores) ** 2 + stdev(new_scores) ** 2)
+        if paired > 0:
+            print(
+                f"  paired sd {paired:.2f} vs {unpaired:.2f} unpaired, which would "
+                f"need about {(unpaired / paired) ** 2:.1f}x as many games"
+            )
+
+    if verdict is None:
+        print(f"  no significant difference after {n} seeds")
+    else:
+        print(f"  new is {verdict} (stopped after {n} seeds)")
+    print("=" * 60)
+
+    return centre, low, high
@@ -0,0 +1,53 @@
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+CONFIG_PATH = Path(__file__).resolve().parent / "difficulties.yaml"
+
+
+def cache_dir():
+    """Where snake keeps its caches, following XDG_CACHE_HOME"""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "snake-ai"
+
+
+def _cache_path():
+    return cache_dir() / "difficulties.json"
+
+
+@lru_cache(maxsize=None)
+def load_config(path=CONFIG_PATH):
+    """
+    Load the difficulty configuration shipped with the package.
+
+    The parsed config is cached as JSON keyed by the YAML file's size and
+    modification time, so most runs never need to import PyYAML.
+    """
+    path = Path(path)
+    stat = path.stat()
+    key = [str(path), stat.st_size, stat.st_mtime_ns]
+
+    cache = _cache_path()
+    try:
+        with open(cache, "r") as f:
+            cached = json.load(f)
+        if cached["key"] == key:
+            return cached["config"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    import yaml
+
+    with open(path, "r") as f:
+        config = yaml.safe_load(f)
+
+    # a missing or read-only cache directory just means parsing every time
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache, "w") as f:
+            json.dump({"key": key, "config": config}, f)
+    except OSError:
+        pass
+
+    return config
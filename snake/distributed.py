@@ -0,0 +1,448 @@
+import base64
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from itertools import count
+
+from snake.cache import ai_fingerprint, engine_fingerprint
+from snake.pool import GameResult, GameTask, run_task
+from snake.replay import Replay
+
+log = logging.getLogger(__name__)
+
+# workers are spawned rather than forked, since the coordinator has threads running
+_context = multiprocessing.get_context("spawn")
+
+# seconds a lease request waits for work before telling the worker to ask again
+POLL_SECONDS = 5.0
+
+
+def parse_address(text, default_host="127.0.0.1"):
+    """Parses "host:port" or just "port" into (host, port)"""
+    host, _, port = text.rpartition(":")
+    try:
+        return host or default_host, int(port)
+    except ValueError:
+        raise ValueError(f"expected host:port or port, got {text!r}") from None
+
+
+def _send(stream, message):
+    stream.write(json.dumps(message).encode() + b"\n")
+    stream.flush()
+
+
+def _receive(stream):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    return json.loads(line)
+
+
+def _fingerprints(task):
+    return [engine_fingerprint(), ai_fingerprint(task.ai), ai_fingerprint(task.enemy_ai)]
+
+
+def encode_result(result):
+    """A GameResult as JSON-friendly fields, replay and telemetry included"""
+    fields = result._asdict()
+    fields["enemy_scores"] = list(result.enemy_scores)
+    if result.replay is not None:
+        fields["replay"] = base64.b64encode(result.replay.to_bytes()).decode()
+    if result.telemetry is not None:
+        # JSON keys are strings, so histogram buckets travel as pairs
+        fields["telemetry"] = dict(
+            result.telemetry,
+            histograms={
+                name: list(h.items()) for name, h in result.telemetry["histograms"].items()
+            },
+        )
+    return fields
+
+
+def decode_result(fields):
+    """Inverse of encode_result"""
+    fields = dict(fields, enemy_scores=tuple(fields["enemy_scores"]))
+    if fields["replay"] is not None:
+        fields["replay"] = Replay.from_bytes(base64.b64decode(fields["replay"]))[0]
+    if fields["telemetry"] is not None:
+        fields["telemetry"] = dict(
+            fields["telemetry"],
+            histograms={
+                name: dict(pairs) for name, pairs in fields["telemetry"]["histograms"].items()
+            },
+        )
+    return GameResult(**fields)
+
+
+class _Unit:
+    # a run of tasks that only differ in their seed, handed out as one
+    def __init__(self, id, tasks):
+        self.id = id
+        self.tasks = tasks
+        self.results = None
+        self.error = None
+        self.deadline = None  # while leased
+        self.holder = None  # the connection holding the lease
+
+    def message(self, fingerprints):
+        task = self.tasks[0]
+        return {
+            "op": "unit",
+            "id": self.id,
+            "cfg": task.cfg,
+            "seeds": [task.seed for task in self.tasks],
+            "ai": task.ai,
+            "enemy_ai": task.enemy_ai,
+            "record": task.record,
+            "timeout": task.timeout,
+            "telemetry": task.telemetry,
+            "fingerprints": fingerprints,
+        }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # one per worker connection, answering its requests in turn
+    def handle(self):
+        coordinator = self.server.coordinator
+        held = set()
+        name = f"{self.client_address[0]}:{self.client_address[1]}"
+        coordinator._connected(1)
+        try:
+            while True:
+                message = _receive(self.rfile)
+                op = message["op"]
+
+                if op == "hello":
+                    name = f"{message['host']}/{message['pid']}"
+                    continue
+
+                if op == "lease":
+                    unit = coordinator._lease(self)
+                    if unit is None:
+                        _send(self.wfile, {"op": "done" if coordinator.closed else "wait"})
+                        continue
+                    held.add(unit.id)
+                    _send(self.wfile, unit.message(coordinator._fingerprints(unit)))
+
+                elif op == "result":
+                    held.discard(message["id"])
+                    coordinator._complete(message["id"], message["results"], None)
+
+                elif op == "error":
+                    held.discard(message["id"])
+                    coordinator._complete(message["id"], None, f"{name}: {message['message']}")
+
+                elif op == "refuse":
+                    # the worker's code differs from ours, so it won't play anything
+                    held.discard(message["id"])
+                    log.warning(
+                        "worker %s refused unit %s: %s", name, message["id"], message["reason"]
+                    )
+                    coordinator._refused(f"{name}: {message['reason']}")
+                    coordinator._release(message["id"], self)
+
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            # whatever a lost worker was holding goes straight back in the queue
+            for id in held:
+                log.warning("worker %s disconnected holding unit %s", name, id)
+                coordinator._release(id, self)
+            coordinator._connected(-1)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Coordinator:
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        unit_size=10,
+        lease=300.0,
+        local_workers=0,
+        idle_timeout=600.0,
+    ):
+        """
+        Hands games out to workers on any host over TCP, as a drop-in GamePool.
+
+        Tasks are split into units of up to unit_size consecutive games that
+        share a config and AIs, so a unit is a difficulty and a range of its
+        seeds. A worker leases a unit, plays it and sends back every game's
+        result. A unit comes back into the queue when its worker disconnects
+        or its lease runs out, and the first result to arrive is the one kept.
+        Workers check they have the same engine and AI sources as the
+        coordinator before playing anything, so pooled results match local ones.
+
+        play raises rather than waiting forever when no worker is playing: once
+        every worker that connected has refused and gone, or when no worker has
+        taken a unit for idle_timeout seconds.
+
+        Messages are newline-delimited JSON. Workers run whatever AIs the
+        coordinator names, so only listen on networks you trust.
+
+        Args:
+            address: (host, port) to listen on, port 0 picks a free one
+            unit_size: Most games in a unit
+            lease: Seconds a worker has to finish a unit before it is handed out again
+            local_workers: Worker processes to start on this machine
+            idle_timeout: Seconds play waits for a worker to take a unit
+        """
+        self.unit_size = unit_size
+        self.lease = lease
+        self.idle_timeout = idle_timeout
+        self.closed = False
+
+        self._units = {}
+        self._pending = deque()
+        self._ids = count()
+        self._fingerprint_cache = {}
+        self._changed = threading.Condition()
+        self._connections = 0
+        self._refusals = []
+        self._last_lease = time.monotonic()
+
+        self._server = _Server(address, _Handler)
+        self._server.coordinator = self
+        self.address = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        # not daemons, since workers with a timeout start AI processes of their own
+        self._workers = [
+            _context.Process(target=work, args=(self.address,)) for _ in range(local_workers)
+        ]
+        for process in self._workers:
+            process.start()
+
+    def _fingerprints(self, unit):
+        task = unit.tasks[0]
+        key = (task.ai, task.enemy_ai)
+        if key not in self._fingerprint_cache:
+            self._fingerprint_cache[key] = _fingerprints(task)
+        return self._fingerprint_cache[key]
+
+    def _connected(self, change):
+        with self._changed:
+            self._connections += change
+            self._changed.notify_all()
+
+    def _refused(self, reason):
+        with self._changed:
+            self._refusals.append(reason)
+
+    def _check_stalled(self):
+        # raises when nothing is being played and no worker is going to play it
+        if any(unit.holder is not None for unit in self._units.values()):
+            return
+        if self._refusals and not self._connections:
+            raise RuntimeError(
+                f"every worker refused to play, the last because {self._refusals[-1]}"
+            )
+        if time.monotonic() - self._last_lease > self.idle_timeout:
+            raise RuntimeError(f"no worker took any games for {self.idle_timeout:.0f}s")
+
+    def _expire(self):
+        # requeues leased units whose workers have gone quiet
+        now = time.monotonic()
+        for unit in self._units.values():
+            if unit.deadline is not None and unit.deadline < now:
+                log.warning("lease on unit %s ran out, handing it out again", unit.id)
+                unit.deadline = None
+                unit.holder = None
+                self._pending.append(unit.id)
+
+    def _lease(self, holder):
+        with self._changed:
+            end = time.monotonic() + POLL_SECONDS
+            while not self.closed:
+                self._expire()
+                while self._pending:
+                    unit = self._units.get(self._pending.popleft())
+                    # skips units finished by an earlier lease in the meantime
+                    if unit is not None and unit.results is None and unit.error is None:
+                        unit.deadline = time.monotonic() + self.lease
+                        unit.holder = holder
+                        self._last_lease = time.monotonic()
+                        return unit
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._changed.wait(min(remaining, 1.0))
+            return None
+
+    def _release(self, id, holder):
+        with self._changed:
+            unit = self._units.get(id)
+            # a unit whose lease ran out may be someone else's by now
+            if unit is not None and unit.holder is holder and unit.results is None:
+                unit.deadline = None
+                unit.holder = None
+                self._pending.append(id)
+                self._changed.notify_all()
+
+    def _complete(self, id, results, error):
+        with self._changed:
+            unit = self._units.get(id)
+            if unit is None or unit.results is not None or unit.error is not None:
+                return
+            unit.deadline = None
+            unit.holder = None
+            if error is not None:
+                unit.error = error
+            else:
+                unit.results = [decode_result(fields) for fields in results]
+            self._changed.notify_all()
+
+    def _split(self, tasks):
+        units = []
+        for task in tasks:
+            last = units[-1] if units else None
+            if (
+                last is not None
+                and len(last) < self.unit_size
+                and last[0]._replace(seed=task.seed) == task
+            ):
+                last.append(task)
+            else:
+                units.append([task])
+        return units
+
+    def play(self, tasks):
+        """
+        Plays every task on the workers, yielding results in task order.
+
+        Raises RuntimeError if a unit fails or no worker is playing (see above).
+        """
+        with self._changed:
+            ids = []
+            for run in self._split(list(tasks)):
+                unit = _Unit(next(self._ids), run)
+                self._units[unit.id] = unit
+                self._pending.append(unit.id)
+                ids.append(unit.id)
+            # the idle clock starts with the first games there are to take
+            self._last_lease = time.monotonic()
+            self._changed.notify_all()
+
+        try:
+            for id in ids:
+                with self._changed:
+                    unit = self._units[id]
+                    while unit.results is None and unit.error is None:
+                        self._expire()
+                        self._check_stalled()
+                        self._changed.wait(1.0)
+                    del self._units[id]
+                if unit.error is not None:
+                    raise RuntimeError(f"unit {id} failed on worker {unit.error}")
+                yield from unit.results
+        finally:
+            # whatever wasn't played is dropped, and skipped by later leases
+            with self._changed:
+                for id in ids:
+                    self._units.pop(id, None)
+
+    def close(self):
+        with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+        for process in self._workers:
+            process.join(POLL_SECONDS + 5)
+            if process.is_alive():
+                process.kill()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _play_unit(message):
+    tasks = [
+        GameTask(
+            message["cfg"],
+            seed,
+            message["ai"],
+            message["enemy_ai"],
+            record=message["record"],
+            timeout=message["timeout"],
+            telemetry=message["telemetry"],
+        )
+        for seed in message["seeds"]
+    ]
+    if _fingerprints(tasks[0]) != message["fingerprints"]:
+        return {
+            "op": "refuse",
+            "id": message["id"],
+            "reason": "engine or AI sources differ from the coordinator's",
+        }
+    try:
+        results = [encode_result(run_task(task)) for task in tasks]
+    except Exception as e:
+        return {"op": "error", "id": message["id"], "message": f"{type(e).__name__}: {e}"}
+    return {"op": "result", "id": message["id"], "results": results}
+
+
+def work(address, retry=30.0):
+    """
+    Plays units for a coordinator until it says it's done.
+
+    Reconnects when the connection drops, giving up once the coordinator
+    has been unreachable for `retry` seconds.
+
+    Returns:
+        Number of games played
+    """
+    played = 0
+    gave_up = time.monotonic() + retry
+    while True:
+        try:
+            with socket.create_connection(tuple(address)) as sock:
+                stream = sock.makefile("rwb")
+                _send(stream, {"op": "hello", "host": socket.gethostname(), "pid": os.getpid()})
+                while True:
+                    _send(stream, {"op": "lease"})
+                    message = _receive(stream)
+                    gave_up = time.monotonic() + retry
+                    if message["op"] == "done":
+                        return played
+                    if message["op"] == "wait":
+                        continue
+
+                    reply = _play_unit(message)
+                    _send(stream, reply)
+                    if reply["op"] == "refuse":
+                        log.error("not playing for %s:%s: %s", *address, reply["reason"])
+                        return played
+                    if reply["op"] == "result":
+                        played += len(reply["results"])
+
+        except (ConnectionError, OSError):
+            if time.monotonic() > gave_up:
+                return played
+            time.sleep(1.0)
+
+
+def work_many(address, workers=1, retry=30.0):
+    """Runs `work` in this process, or in that many worker processes"""
+    if workers == 1:
+        work(address, retry)
+        return
+
+    processes = [_context.Process(target=work, args=(address, retry)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
@@ -0,0 +1,129 @@
+from snake.ai import DEFAULT_ENEMY_AI
+from snake.logic import DIRECTIONS, GameState, Turn
+
+# the order smartAI tries turns in
+TURNS = list(Turn)
+
+
+def _decide(safe, direction, sx, sy):
+    # smartAI's rule, for a pattern: the first safe turn that closes in on
+    # the food along either axis, else the first safe turn, else straight on
+    turns = [turn for k, turn in enumerate(TURNS) if safe >> k & 1]
+    if not turns:
+        return Turn.STRAIGHT
+    for turn in turns:
+        dx, dy = DIRECTIONS[(direction + turn.value) % 4]
+        if (dx and dx == sx) or (dy and dy == sy):
+            return turn
+    return turns[0]
+
+
+# smartAI's turn for every local pattern, indexed as in _lookup. with no food
+# nothing closes in, exactly as when the food is level with the head, so a
+# board without food is looked up as sx = sy = 0
+_TABLE = tuple(
+    _decide(safe, direction, sx, sy)
+    for safe in range(8)
+    for direction in range(4)
+    for sx in (-1, 0, 1)
+    for sy in (-1, 0, 1)
+)
+
+
+# the (dx, dy) each of TURNS moves by, for each direction
+_MOVES = tuple(
+    tuple(DIRECTIONS[(direction + turn.value) % 4] for turn in TURNS)
+    for direction in range(4)
+)
+
+
+def _lookup(safe, direction, head, food):
+    # packs which turns are safe (bit k for TURNS[k]), the direction and which
+    # way the first food lies on each axis into an index into _TABLE
+    x, y = head
+    sx = sy = 0
+    if food:
+        fx, fy = next(iter(food))
+        sx = (fx > x) - (fx < x)
+        sy = (fy > y) - (fy < y)
+    return _TABLE[((safe * 4 + direction) * 3 + sx + 1) * 3 + sy + 1]
+
+
+def smart_turn(game, snake_idx):
+    """
+    Picks smartAI's move for a snake, straight from the game's occupancy map.
+
+    Gives exactly the turn smartAI(game.getGameState(snake_idx)) would, without
+    building a GameState or a set of every enemy's body: a cell is unsafe if it
+    is off the board, a wall, or in any living snake's body (our own included).
+    """
+    snake = game.snakes[snake_idx]
+    occupied = game.occupied
+    walls = game.walls
+    width, height = game.width, game.height
+    x, y = snake.head
+
+    safe = 0
+    bit = 1
+    for dx, dy in _MOVES[snake.direction]:
+        head = (x + dx, y + dy)
+        if 0 <= head[0] < width and 0 <= head[1] < height and head not in walls:
+            # a dead player's body stays on the board but smartAI doesn't see it
+            owner = occupied.get(head)
+            if owner is None or not owner.isAlive:
+                safe |= bit
+        bit <<= 1
+
+    # the first food is the same one list(state.food)[0] would pick
+    return _lookup(safe, snake.direction, snake.head, game.food)
+
+
+def tableAI(state: GameState) -> Turn:
+    """
+    smartAI, deciding from a precomputed table of local patterns.
+
+    Only the three cells the snake can move into are checked, against the
+    bodies as they are rather than a set of every one, and the rest is a
+    single lookup. A drop-in for smartAI wherever it is given a GameState,
+    e.g. "snake.enemies:tableAI" or an AI's lookahead.
+    """
+    snake = state.snake
+    enemies = state.enemies
+    walls = state.walls
+    width, height = state.width, state.height
+    x, y = snake.head
+
+    safe = 0
+    bit = 1
+    for dx, dy in _MOVES[snake.direction]:
+        head = (x + dx, y + dy)
+        if (
+            0 <= head[0] < width
+            and 0 <= head[1] < height
+            and head not in walls
+            and head not in snake.body
+        ):
+            for enemy in enemies:
+                if head in enemy.body:
+                    break
+            else:
+                safe |= bit
+        bit <<= 1
+
+    return _lookup(safe, snake.direction, snake.head, state.food)
+
+
+def enemy_policy(enemy_ai):
+    """
+    Gets a function (game, snake_idx) -> Turn that moves enemies for an AI.
+
+    smartAI and tableAI are swapped for smart_turn; any other AI is given its
+    GameState as usual. Either way enemies must be moved one at a time in index
+    order, as each one sees the moves of those before it.
+    """
+    module, _, name = DEFAULT_ENEMY_AI.partition(":")
+    if enemy_ai is tableAI or (
+        getattr(enemy_ai, "__module__", None) == module and enemy_ai.__name__ == name
+    ):
+        return smart_turn
+    return lambda game, snake_idx: enemy_ai(game.getGameState(snake_idx))
@@ -0,0 +1,187 @@
+import random
+
+import numpy as np
+
+from snake.ai import DEFAULT_ENEMY_AI, load_ai
+from snake.config import load_config
+from snake.enemies import enemy_policy
+from snake.logic import SnakeGame
+from snake.observation import NUM_CHANNELS
+from snake.replay import TURNS
+
+# gymnasium is optional, without it the environments keep the same API
+try:
+    import gymnasium
+    from gymnasium import spaces
+except ImportError:
+    gymnasium = None
+
+
+def _resolve_config(difficulty):
+    if isinstance(difficulty, dict):
+        return difficulty
+    return load_config()["difficulties"][difficulty]
+
+
+class SnakeEnv(gymnasium.Env if gymnasium is not None else object):
+    metadata = {"render_modes": []}
+
+    def __init__(
+        self, difficulty="medium", enemy_ai=DEFAULT_ENEMY_AI, egocentric=False
+    ):
+        """
+        Gymnasium environment where the agent controls the player's snake.
+
+        Actions are 0=LEFT, 1=STRAIGHT, 2=RIGHT. Observations are float32
+        (channels, height, width) planes, see snake.observation for the
+        channels; body planes hold each segment's age + 1. The reward is the
+        score gained by the move; the episode terminates when the snake dies
+        and is truncated at the difficulty's max_moves.
+
+        Args:
+            difficulty: Name of a difficulty in difficulties.yaml, or a config dict
+            enemy_ai: AI driving the enemies as "module:function"
+            egocentric: Rotate observations so the snake always faces up
+        """
+        cfg = _resolve_config(difficulty)
+        self.enemy_turn = enemy_policy(load_ai(enemy_ai))
+        self.game = SnakeGame(
+            width=cfg["width"],
+            height=cfg["height"],
+            num_enemies=cfg["num_enemies"],
+            max_moves=cfg["max_moves"],
+            num_food=cfg["num_food"],
+        )
+        if egocentric and cfg["width"] != cfg["height"]:
+            raise ValueError("egocentric observations need a square board")
+        self.egocentric = egocentric
+
+        # the game keeps its planes up to date itself, observations are copies
+        self.game.observe()
+        self.observer = self.game.observer
+        shape = (NUM_CHANNELS, cfg["height"], cfg["width"])
+        self.max_age = float(cfg["max_moves"] + 1)
+
+        if gymnasium is not None:
+            self.action_space = spaces.Discrete(3)
+            self.observation_space = spaces.Box(0.0, self.max_age, shape, np.float32)
+
+    def observe(self, out=None):
+        """Writes the current observation into out, or a new array"""
+        return self.observer.ages(out, self.egocentric)
+
+    def _info(self):
+        return {"score": self.game.snakes[0].score, "moves": self.game.moves}
+
+    def reset(self, seed=None, options=None):
+        if gymnasium is not None:
+            super().reset(seed=seed)
+            if seed is None:
+                seed = int(self.np_random.integers(2**32))
+        elif seed is None:
+            seed = random.getrandbits(32)
+
+        self.game.reset(seed)
+        return self.observe(), self._info()
+
+    def _advance(self, action):
+        """Plays one tick, returning the reward and whether the episode ended"""
+        game = self.game
+        player = game.snakes[0]
+        score = player.score
+
+        game.move_snake(0, TURNS[int(action)])
+        for i in range(1, len(game.snakes)):
+            if game.snakes[i].isAlive:
+                game.move_snake(i, self.enemy_turn(game, i))
+
+        terminated = not player.isAlive
+        truncated = game.game_over and not terminated
+        return float(player.score - score), terminated, truncated
+
+    def step(self, action):
+        reward, terminated, truncated = self._advance(action)
+        return self.observe(), reward, terminated, truncated, self._info()
+
+
+class SnakeVecEnv:
+    def __init__(
+        self,
+        num_envs,
+        difficulty="medium",
+        enemy_ai=DEFAULT_ENEMY_AI,
+        egocentric=False,
+    ):
+        """
+        Steps many SnakeEnvs in lockstep, resetting finished ones automatically.
+
+        Observations are written into one preallocated (num_envs, channels,
+        height, width) array. When an episode ends its final observation and
+        info are returned in infos["final_observation"] / infos["final_info"]
+        and the observation returned is the first one of the next episode.
+        """
+        self.num_envs = num_envs
+        self.envs = [
+            SnakeEnv(difficulty, enemy_ai, egocentric) for _ in range(num_envs)
+        ]
+        shape = self.envs[0].game.observer.planes.shape
+        self.observations = np.zeros((num_envs,) + shape, np.float32)
+        self.rewards = np.zeros(num_envs, np.float32)
+        self.terminated = np.zeros(num_envs, bool)
+        self.truncated = np.zeros(num_envs, bool)
+
+        if gymnasium is not None:
+            self.single_action_space = self.envs[0].action_space
+            self.single_observation_space = self.envs[0].observation_space
+            self.action_space = spaces.MultiDiscrete([3] * num_envs)
+            self.observation_space = spaces.Box(
+                0.0, self.envs[0].max_age, self.observations.shape, np.float32
+            )
+
+    def reset(self, seed=None):
+        """Resets every env, seeding env i with seed + i when a seed is given"""
+        for i, env in enumerate(self.envs):
+            env.reset(seed=None if seed is None else seed + i)
+            env.observe(self.observations[i])
+        return self.observations.copy(), self._infos()
+
+    def _infos(self):
+        return {
+            "score": np.array([env.game.snakes[0].score for env in self.envs]),
+            "moves": np.array([env.game.moves for env in self.envs]),
+        }
+
+    def step(self, actions):
+        final_observation = np.full(self.num_envs, None, dtype=object)
+        final_info = np.full(self.num_envs, None, dtype=object)
+
+        for i, env in enumerate(self.envs):
+            reward, terminated, truncated = env._advance(actions[i])
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+
+            if terminated or truncated:
+                final_observation[i] = env.observe()
+                final_info[i] = env._info()
+                env.reset()
+            env.observe(self.observations[i])
+
+        infos = self._infos()
+        done = self.terminated | self.truncated
+        if done.any():
+            infos["final_observation"] = final_observation
+            infos["_final_observation"] = done.copy()
+            infos["final_info"] = final_info
+            infos["_final_info"] = done.copy()
+
+        return (
+            self.observations.copy(),
+            self.rewards.copy(),
+            self.terminated.copy(),
+            self.truncated.copy(),
+            infos,
+        )
+
+    def close(self):
+        pass
@@ -0,0 +1,68 @@
+from typing import NamedTuple
+
+from snake.logic import GameState, Snake
+
+
+# cells are packed into a single index, y * width + x
+def unpack_cell(cell, width):
+    y, x = divmod(cell, width)
+    return x, y
+
+
+class SnakeFrame(NamedTuple):
+    id: int
+    body: tuple  # packed cells, head first
+    direction: int
+    isAlive: bool
+    score: int
+
+
+class Frame(NamedTuple):
+    width: int
+    height: int
+    snake: SnakeFrame
+    enemies: tuple
+    food: tuple
+    walls: tuple
+
+
+class FrameSnapshotter:
+    def __init__(self):
+        """
+        Takes compact, immutable snapshots of game states for rendering.
+
+        Walls change rarely, so consecutive frames share one walls tuple until
+        the wall set is replaced or changes size. Walls are only ever added
+        between ticks (spawn_wall removes the wall it just tried), so its size
+        is enough to tell when the set has changed.
+        """
+        self._walls_source = None
+        self._walls_size = -1
+        self._walls = ()
+
+    def _snake(self, snake: Snake, width):
+        return SnakeFrame(
+            snake.id,
+            tuple(y * width + x for x, y in snake.body),
+            snake.direction,
+            snake.isAlive,
+            snake.score,
+        )
+
+    def __call__(self, state: GameState):
+        width = state.width
+
+        walls = state.walls
+        if walls is not self._walls_source or len(walls) != self._walls_size:
+            self._walls_source = walls
+            self._walls_size = len(walls)
+            self._walls = tuple(y * width + x for x, y in walls)
+
+        return Frame(
+            width,
+            state.height,
+            self._snake(state.snake, width),
+            tuple(self._snake(enemy, width) for enemy in state.enemies),
+            tuple(y * width + x for x, y in state.food),
+            self._walls,
+        )
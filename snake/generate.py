@@ -0,0 +1,215 @@
+import multiprocessing
+import os
+import random
+from pathlib import Path
+
+import numpy as np
+from tqdm import tqdm
+
+from snake.ai import DEFAULT_AI, DEFAULT_ENEMY_AI, load_ai
+from snake.enemies import enemy_policy
+from snake.logic import SnakeGame
+from snake.observation import NUM_CHANNELS
+from snake.pool import seeded_random
+
+# workers are spawned so they start without the writer's threads and buffers
+_context = multiprocessing.get_context("spawn")
+
+
+def play_samples(cfg, seed, ai, enemy_turn, egocentric=False):
+    """
+    Plays one game, returning what the player saw and did at every tick it moved.
+
+    The random module is seeded with the game's seed for the length of the
+    game, as run_task does, so AIs that use it play the same game every time.
+
+    Returns:
+        A dict of arrays, one row per tick: observations (ages as from
+        SnakeEnv.observe, stored as uint16), actions (turn.value + 1), outcomes
+        (the points the player went on to score from that tick) and seeds
+    """
+    game = SnakeGame(
+        width=cfg["width"],
+        height=cfg["height"],
+        num_enemies=cfg["num_enemies"],
+        max_moves=cfg["max_moves"],
+        num_food=cfg["num_food"],
+        seed=seed,
+    )
+    game.observe()
+    observer = game.observer
+
+    shape = (NUM_CHANNELS, cfg["height"], cfg["width"])
+    observations = np.empty((cfg["max_moves"] + 1,) + shape, np.uint16)
+    scratch = np.empty(shape, np.float32)
+    actions = []
+    scores = []
+
+    with seeded_random(seed):
+        while not game.game_over:
+            for i in range(len(game.snakes)):
+                if not game.snakes[i].isAlive:
+                    continue
+                if i == 0:
+                    # ages are whole ticks, so they fit the smaller dtype exactly
+                    observations[len(actions)] = observer.ages(scratch, egocentric)
+                    scores.append(game.snakes[0].score)
+                    turn = ai(game.getGameState(0))
+                    actions.append(turn.value + 1)
+                else:
+                    turn = enemy_turn(game, i)
+                game.move_snake(i, turn)
+
+    n = len(actions)
+    return {
+        "observations": observations[:n].copy(),
+        "actions": np.array(actions, np.uint8),
+        "outcomes": game.snakes[0].score - np.array(scores, np.int32),
+        "seeds": np.full(n, seed, np.uint64),
+    }
+
+
+def _produce(cfg, ai, enemy_ai, seeds, egocentric, queue):
+    # runs in a worker: plays its seeds, blocking on the queue while it's full
+    try:
+        ai = load_ai(ai)
+        enemy_turn = enemy_policy(load_ai(enemy_ai))
+        for seed in seeds:
+            queue.put(play_samples(cfg, seed, ai, enemy_turn, egocentric))
+    except Exception as e:
+        queue.put(f"{type(e).__name__}: {e}")
+    finally:
+        queue.put(None)
+
+
+class ShardWriter:
+    def __init__(self, output, shard_size=50_000):
+        """
+        Gathers per-game samples into compressed .npz shards of shard_size ticks.
+
+        Shards are written to a temporary name and renamed when complete, so a
+        reader never sees half a shard.
+
+        Args:
+            output: Directory to write shard_00000.npz, ... into
+            shard_size: Ticks per shard (the last one may be smaller)
+        """
+        self.output = Path(output)
+        self.output.mkdir(parents=True, exist_ok=True)
+        self.shard_size = shard_size
+        self.shards = 0
+        self.ticks = 0
+        self._pending = []
+        self._size = 0
+
+        # carries on after any shards already there
+        while (self.output / f"shard_{self.shards:05d}.npz").exists():
+            self.shards += 1
+
+    def add(self, samples):
+        self._pending.append(samples)
+        self._size += len(samples["actions"])
+        while self._size >= self.shard_size:
+            self._write(self.shard_size)
+
+    def _write(self, size):
+        merged = {
+            key: np.concatenate([samples[key] for samples in self._pending])
+            for key in self._pending[0]
+        }
+        shard = {key: values[:size] for key, values in merged.items()}
+        rest = {key: values[size:] for key, values in merged.items()}
+        self._pending = [rest] if len(rest["actions"]) else []
+        self._size -= size
+
+        path = self.output / f"shard_{self.shards:05d}.npz"
+        partial = path.with_name(path.name + ".partial")
+        with open(partial, "wb") as f:
+            np.savez_compressed(f, **shard)
+        os.replace(partial, path)
+        self.shards += 1
+        self.ticks += size
+
+    def close(self):
+        if self._size:
+            self._write(self._size)
+
+
+def generate(
+    cfg,
+    games,
+    output,
+    ai=DEFAULT_AI,
+    enemy_ai=DEFAULT_ENEMY_AI,
+    workers=None,
+    shard_size=50_000,
+    queue_size=None,
+    egocentric=False,
+):
+    """
+    Plays games across worker processes, streaming their ticks into shards.
+
+    Workers hand each finished game to the writer through a bounded queue of
+    their own and block while it's full, so however far the workers get ahead
+    of the compression, about queue_size games are held in memory at once. The
+    writer takes games in the order their seeds were drawn, so a seeded run
+    writes the same shards whatever the worker count.
+
+    Args:
+        cfg: The difficulty config to play
+        games: Number of games to play
+        output: Directory for the shards
+        ai: The player's AI, whose moves are recorded
+        enemy_ai: The enemies' AI
+        workers: Worker processes, defaults to one per core
+        shard_size: Ticks per shard
+        queue_size: Most finished games waiting for the writer, defaults to 2 per worker
+        egocentric: Rotate observations so the player faces up (square boards only)
+    """
+    if egocentric and cfg["width"] != cfg["height"]:
+        raise ValueError("egocentric observations need a square board")
+
+    workers = workers or os.cpu_count() or 1
+    queues = [
+        _context.Queue(maxsize=max(1, (queue_size or 2 * workers) // workers))
+        for _ in range(workers)
+    ]
+
+    # drawn up front, so a seeded run plays the same games however they're split
+    seeds = [random.getrandbits(32) for _ in range(games)]
+    processes = [
+        _context.Process(
+            target=_produce,
+            args=(cfg, ai, enemy_ai, seeds[i::workers], egocentric, queues[i]),
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    writer = ShardWriter(output, shard_size)
+    try:
+        with tqdm(total=games, desc="Generating", unit="game") as pbar:
+            # game i is the next one from the worker given seeds[i]
+            for i in range(games):
+                samples = queues[i % workers].get()
+                if samples is None:
+                    raise RuntimeError("a worker stopped before playing its games")
+                if isinstance(samples, str):
+                    raise RuntimeError(f"a worker failed: {samples}")
+                writer.add(samples)
+                pbar.update(1)
+                pbar.set_postfix({"shards": writer.shards})
+        writer.close()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+            process.join()
+
+    print(
+        f"\nWrote {writer.ticks} ticks from {games} games "
+        f"to {writer.shards} shards in {output}"
+    )
+    return writer.ticks
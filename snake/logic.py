@@ -21,6 +21,18 @@ class Direction(Enum):
 
 DIRECTIONS = [(0, -1), (1, 0), (0, 1), (-1, 0)]
 
+# boards up to this many cells pick random cells exactly as they always have
+# (a choice over a scan of every empty cell), so existing seeds and replays
+# play out the same; bigger boards guess cells until they find an empty one
+EXACT_SAMPLING_CELLS = 32 * 32
+
+# guesses before giving up and scanning for the few empty cells left
+SAMPLE_ATTEMPTS = 32
+
+# engine counters and histograms, a snake.telemetry.Telemetry while enabled
+# every hook checks for None first, so they cost nothing the rest of the time
+telemetry = None
+
 
 class Snake:
     def __init__(self, x, y, id, direction=1):
@@ -66,35 +78,114 @@ class GameState:
     walls: set
     score: int
 
+    # a compact, versioned encoding for sending states between processes
+    # see snake.codec for the layout
+    def to_bytes(self):
+        from snake.codec import state_to_bytes
+
+        return state_to_bytes(self)
+
+    # decodes a state from to_bytes, overwriting `into` (and reusing its
+    # snakes and sets) rather than allocating a new one when it's given
+    @staticmethod
+    def from_bytes(data, offset=0, into=None):
+        from snake.codec import state_from_bytes
+
+        return state_from_bytes(data, offset, into)
+
 
 class SnakeGame:
-    def __init__(self, width=10, height=10, num_enemies=1, num_food=5, max_moves=1000):
+    def __init__(
+        self, width=10, height=10, num_enemies=1, num_food=5, max_moves=1000, seed=None
+    ):
         self.width = width
         self.height = height
         self.num_enemies = num_enemies
         self.num_food = num_food
         self.max_moves = max_moves
         self.moves = 0
-        self.reset()  # in case people dont!
+        self.observer = None
+        self.reset(seed)  # in case people dont!
 
     # resets all snake game state
-    def reset(self):
+    # each game draws from its own generator, so the seed and the turns taken
+    # are enough to replay it exactly (see snake.replay)
+    def reset(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.turns = bytearray()
+
         self.game_over = False
         self.moves = 0
         self.snakes = []
         self.food = set()
         self.walls = set()
 
+        # the snake occupying each cell, kept up to date as snakes move, so
+        # collisions and empty cells are found without building every body
+        # note that a dead player's body stays, as it still blocks enemies
+        self.occupied = {}
+
+        # the living snakes in order, for building each snake's enemies
+        self.alive = []
+        self._alive_index = {}
+
         for _ in range(self.num_food):
             self.spawn_food()
 
         for i in range(self.num_enemies + 1):
-            pos = random.choice(list(self.get_empty_cells()))
-            self.snakes.append(
-                Snake(pos[0], pos[1], id=i, direction=random.randint(0, 3))
-            )
+            pos = self.random_empty_cell()
+            snake = Snake(pos[0], pos[1], id=i, direction=self.rng.randint(0, 3))
+            self.snakes.append(snake)
+            self.occupied[pos] = snake
 
         self.invalid_wall_cache = set()
+        self._index_alive()
+
+        if self.observer is not None:
+            self.observer.rebuild()
+
+    # rebuilds the occupancy map and living snakes from the snakes themselves
+    # needed after changing snakes directly rather than through move_snake
+    def reindex(self):
+        self.occupied = {}
+        for snake in self.snakes:
+            if snake.isAlive or snake is self.snakes[0]:
+                for pos in snake.body:
+                    self.occupied[pos] = snake
+        self._index_alive()
+
+    # everything needed to carry on playing: the snakes, food, walls, config,
+    # the generator's state and the turns recorded so far (not the observer)
+    # sets come back with the same cells but not necessarily in the same order,
+    # so a decoded game plays on the same for AIs that don't depend on set order
+    def to_bytes(self):
+        from snake.codec import game_to_bytes
+
+        return game_to_bytes(self)
+
+    # decodes a game from to_bytes, overwriting `into` in place (reusing its
+    # snakes and sets, and rebuilding its observer) when it's given
+    @staticmethod
+    def from_bytes(data, offset=0, into=None):
+        from snake.codec import game_from_bytes
+
+        return game_from_bytes(data, offset, into)
+
+    def _index_alive(self):
+        self.alive = [s for s in self.snakes if s.isAlive]
+        self._alive_index = {s.id: k for k, s in enumerate(self.alive)}
+
+    # keeps a numpy observation of the board up to date as the game is played
+    # returns the (channels, height, width) planes, see snake.observation
+    def observe(self):
+        if self.observer is None:
+            from snake.observation import BoardObserver
+
+            self.observer = BoardObserver(self)
+        return self.observer.planes
 
     # checks if the game is over
     def isGameOver(self):
@@ -102,13 +193,17 @@ class SnakeGame:
 
     # returns a game state from the perspective of a give snake
     def getGameState(self, snake_idx):
+        snake = self.snakes[snake_idx]
+
+        # every living snake but this one, in order
+        k = self._alive_index.get(snake.id)
+        enemies = self.alive[:k] + self.alive[k + 1 :] if k is not None else self.alive[:]
+
         return GameState(
             width=self.width,
             height=self.height,
-            snake=self.snakes[snake_idx],
-            enemies=[
-                s for s in self.snakes if s != self.snakes[snake_idx] and s.isAlive
-            ],
+            snake=snake,
+            enemies=enemies,
             food=self.food,
             walls=self.walls,
             score=self.snakes[snake_idx].score,
@@ -116,8 +211,13 @@ class SnakeGame:
 
     # moves a given snake
     def move_snake(self, snake_idx, turn):
+        self.turns.append(turn.value + 1)
         moved = self._move_snake(self.snakes[snake_idx], turn)
         self.snakes[snake_idx].isAlive = moved
+        if not moved:
+            self._index_alive()
+        if telemetry is not None:
+            telemetry.count("moves")
 
         if snake_idx == 0:
             self.game_over = not moved
@@ -129,8 +229,15 @@ class SnakeGame:
             return moved
 
         if not moved:
+            if self.observer is not None:
+                self.observer.died(self.snakes[snake_idx])
             for pos in list(self.snakes[snake_idx].body):
+                del self.occupied[pos]
                 self.food.add(pos)
+                if self.observer is not None:
+                    self.observer.food(pos, True)
+            if telemetry is not None:
+                telemetry.count("food.from_dead_enemies", len(self.snakes[snake_idx].body))
 
         return moved
 
@@ -139,43 +246,42 @@ class SnakeGame:
         next_head = snake.get_next_head(turn)
 
         if next_head in self.walls:
+            if telemetry is not None:
+                telemetry.count("deaths.wall")
             return False
 
         if not (0 <= next_head[0] < self.width and 0 <= next_head[1] < self.height):
+            if telemetry is not None:
+                telemetry.count("deaths.border")
             return False
 
-        # checks if we would collide with self
-        # note that we disclude the tail as this will move
-        body_without_tail = list(snake.body)[:-1]
-        if next_head in body_without_tail:
-            return False
-
-        # checks collisions with all other snakes (both player and enemies)
-        all_other_bodies = set()
-
-        # adds player snake if we're not moving the player
-        if snake is not self.snakes[0]:
-            all_other_bodies |= self.snakes[0].body_set
-
-        # adds all enemy snakes except the one we're moving
-        for other_snake in self.snakes[1:]:
-            if other_snake.isAlive:
-                if other_snake is snake:
-                    continue
-                all_other_bodies |= other_snake.body_set
-
-        if next_head in all_other_bodies:
+        # checks collisions with every snake (both player and enemies)
+        # note that we disclude our own tail as this will move
+        owner = self.occupied.get(next_head)
+        if owner is not None and not (owner is snake and next_head == snake.body[-1]):
+            if telemetry is not None:
+                telemetry.count("deaths.self" if owner is snake else "deaths.snake")
             return False
 
         # checks if we're moving into an apple
         will_eat = next_head in self.food
 
         # moves the snake, telling it whether to grow or not
+        old_head, tail = snake.head, snake.body[-1]
         snake.move(turn, grow=will_eat)
+        if not will_eat:
+            del self.occupied[tail]
+        self.occupied[next_head] = snake
+        if self.observer is not None:
+            self.observer.moved(snake, old_head, None if will_eat else tail)
 
         # spawns a new food and wall
         if will_eat:
             self.food.remove(next_head)
+            if self.observer is not None:
+                self.observer.food(next_head, False)
+            if telemetry is not None:
+                telemetry.count("food.eaten")
             if len(self.food) < self.num_food:
                 self.spawn_food()
             snake.score += 1
@@ -186,21 +292,32 @@ class SnakeGame:
 
     # spawns an apple at a random unoccupied cell
     def spawn_food(self):
-        empty = self.get_empty_cells()
-        if empty:
-            self.food.add(random.choice(list(empty)))
+        pos = self.random_empty_cell()
+        if telemetry is not None:
+            telemetry.count("food.spawned" if pos is not None else "food.no_room")
+        if pos is not None:
+            self.food.add(pos)
+            if self.observer is not None:
+                self.observer.food(pos, True)
 
     # spawns a wall at a random unoccupied cell
     # considers some simple rules to avoid blocking the grid
     def spawn_wall(self):
+        if telemetry is not None:
+            telemetry.count("walls.attempts")
+            telemetry.observe("walls.invalid_cache_size", len(self.invalid_wall_cache))
+
         if len(self.walls) >= self.width * self.height * 0.25:
+            if telemetry is not None:
+                telemetry.count("walls.rejected.full")
             return
 
-        candidates = self.get_empty_cells() - self.invalid_wall_cache
-        if not candidates:
+        pos = self.random_empty_cell(exclude=self.invalid_wall_cache)
+        if pos is None:
+            if telemetry is not None:
+                telemetry.count("walls.rejected.no_candidates")
             return
 
-        pos = random.choice(list(candidates))
         self.walls.add(pos)
 
         # helpers
@@ -216,6 +333,8 @@ class SnakeGame:
                 if wall_count >= 3:
                     self.walls.remove(pos)
                     self.invalid_wall_cache.add(pos)
+                    if telemetry is not None:
+                        telemetry.count("walls.rejected.dead_end")
                     return
 
         # finds connected wall cluster
@@ -238,6 +357,9 @@ class SnakeGame:
                     cluster.add(np)
                     queue.append(np)
 
+        if telemetry is not None:
+            telemetry.observe("walls.cluster_size", len(cluster))
+
         # checks border touches
         borders = set()
         for x, y in cluster:
@@ -254,6 +376,8 @@ class SnakeGame:
         if len(borders) >= 2:
             self.walls.remove(pos)
             self.invalid_wall_cache.add(pos)
+            if telemetry is not None:
+                telemetry.count("walls.rejected.two_borders")
             return
 
         # adds buffer zone around border-touching clusters
@@ -280,6 +404,8 @@ class SnakeGame:
                             ]:
                                 self.walls.remove(pos)
                                 self.invalid_wall_cache.add(pos)
+                                if telemetry is not None:
+                                    telemetry.count("walls.rejected.near_border_wall")
                                 return
 
         # checks if wall has 3+ neighbors
@@ -287,6 +413,47 @@ class SnakeGame:
             if sum(1 for n in neighbors(pos) if n in self.walls) >= 3:
                 self.walls.remove(pos)
                 self.invalid_wall_cache.add(pos)
+                if telemetry is not None:
+                    telemetry.count("walls.rejected.crowded")
+                return
+
+        if self.observer is not None:
+            self.observer.wall(pos, True)
+        if telemetry is not None:
+            telemetry.count("walls.placed")
+
+    # picks a random empty cell, or None if the board is full
+    # cells in exclude are treated as taken
+    def random_empty_cell(self, exclude=None):
+        if self.width * self.height <= EXACT_SAMPLING_CELLS:
+            empty = self.get_empty_cells()
+            if exclude is not None:
+                empty = empty - exclude
+            if telemetry is not None:
+                telemetry.observe("cells.candidates", len(empty))
+            return self.rng.choice(list(empty)) if empty else None
+
+        for attempt in range(1, SAMPLE_ATTEMPTS + 1):
+            pos = (self.rng.randrange(self.width), self.rng.randrange(self.height))
+            if self.is_empty(pos) and (exclude is None or pos not in exclude):
+                if telemetry is not None:
+                    telemetry.observe("cells.sample_attempts", attempt)
+                return pos
+
+        # the board is nearly full, so finds what's left
+        if telemetry is not None:
+            telemetry.count("cells.full_scans")
+        empty = [
+            (x, y)
+            for y in range(self.height)
+            for x in range(self.width)
+            if self.is_empty((x, y)) and (exclude is None or (x, y) not in exclude)
+        ]
+        return self.rng.choice(empty) if empty else None
+
+    # checks if a cell has no snake, food or wall in it
+    def is_empty(self, pos):
+        return pos not in self.occupied and pos not in self.food and pos not in self.walls
 
     # gets all the empty cells in the grid
     def get_empty_cells(self):
@@ -0,0 +1,107 @@
+import numpy as np
+
+# observation channels, each a (height, width) plane
+OWN_HEAD, OWN_BODY, ENEMY_HEADS, ENEMY_BODIES, FOOD, WALLS = range(6)
+NUM_CHANNELS = 6
+BODIES = [OWN_BODY, ENEMY_BODIES]
+
+
+class BoardObserver:
+    def __init__(self, game):
+        """
+        Keeps a (channels, height, width) float32 view of a game up to date.
+
+        SnakeGame calls back into the observer as snakes move, eat and die and
+        as food and walls appear, so each tick costs a handful of writes
+        rather than a rebuild. Use SnakeGame.observe() rather than creating
+        one directly.
+
+        Heads, food and walls are 0/1. The body planes hold the tick each
+        segment was laid plus one, so a segment's age in ticks is
+        `moves + 1 - value` (0 for the head) without touching every segment
+        every tick; see ages() for that conversion.
+        """
+        self.game = game
+        self.planes = np.zeros((NUM_CHANNELS, game.height, game.width), np.float32)
+        self.rebuild()
+
+    def rebuild(self):
+        """Redraws every plane from the game, e.g. after a reset"""
+        planes = self.planes
+        planes.fill(0)
+        game = self.game
+
+        for snake in game.snakes:
+            if snake is not game.snakes[0] and not snake.isAlive:
+                continue
+            head, body = self._channels(snake)
+            # a dead player's head was laid the tick before it died
+            stamp = game.moves + (1 if snake.isAlive else 0)
+            for age, (x, y) in enumerate(snake.body):
+                planes[body, y, x] = max(1, stamp - age)
+            x, y = snake.head
+            planes[head, y, x] = 1
+
+        for x, y in game.food:
+            planes[FOOD, y, x] = 1
+        for x, y in game.walls:
+            planes[WALLS, y, x] = 1
+
+    def _channels(self, snake):
+        if snake is self.game.snakes[0]:
+            return OWN_HEAD, OWN_BODY
+        return ENEMY_HEADS, ENEMY_BODIES
+
+    def moved(self, snake, old_head, tail):
+        """A snake moved from old_head, vacating tail unless it grew (tail is None)"""
+        planes = self.planes
+        head, body = self._channels(snake)
+
+        # the player moves before the move counter ticks over, enemies after
+        stamp = self.game.moves + (2 if head == OWN_HEAD else 1)
+
+        if tail is not None:
+            planes[body, tail[1], tail[0]] = 0
+        planes[head, old_head[1], old_head[0]] = 0
+
+        x, y = snake.head
+        planes[head, y, x] = 1
+        planes[body, y, x] = stamp
+
+    def died(self, snake):
+        """An enemy died, its body is about to turn into food"""
+        head, body = self._channels(snake)
+        for x, y in snake.body:
+            self.planes[body, y, x] = 0
+        x, y = snake.head
+        self.planes[head, y, x] = 0
+
+    def food(self, pos, present):
+        self.planes[FOOD, pos[1], pos[0]] = present
+
+    def wall(self, pos, present):
+        self.planes[WALLS, pos[1], pos[0]] = present
+
+    def egocentric(self):
+        """The planes rotated (as a view) so the player's snake faces up"""
+        # a quarter turn anticlockwise per step clockwise from up
+        return np.rot90(self.planes, self.game.snakes[0].direction, axes=(1, 2))
+
+    def ages(self, out=None, egocentric=False):
+        """
+        Copies the planes with body stamps turned into age + 1 (1 at the head).
+
+        Args:
+            out: Array to write into, allocated if not given
+            egocentric: Rotate so the player's snake faces up
+        """
+        planes = self.egocentric() if egocentric else self.planes
+        if out is None:
+            out = np.empty(planes.shape, np.float32)
+        np.copyto(out, planes)
+
+        now = self.game.moves + 2
+        for channel in BODIES:
+            body = out[channel]
+            np.subtract(now, body, out=body, where=body > 0)
+        return out
@@ -0,0 +1,13 @@
+# the Google Snake theme shared by the raylib renderer and the headless rasterizer
+BG_BOARD = (170, 215, 81)  # Light green board
+BG_FRAME = (87, 138, 52)  # Dark green frame
+CHECKER_LIGHT = (162, 209, 73)  # Lighter checker
+SNAKE_COLOR = (58, 103, 240)  # Google blue snake
+ENEMY_COLOR = (231, 71, 71)  # Red enemy snakes
+APPLE_RED = (231, 71, 71)  # Bright red apple
+APPLE_GREEN = (100, 180, 50)  # Green leaf
+APPLE_HIGHLIGHT = (255, 180, 180)
+APPLE_STEM = (139, 69, 19)
+WALL_COLOR = (87, 138, 52)  # Dark green walls
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
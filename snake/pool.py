@@ -0,0 +1,166 @@
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from snake.ai import DEFAULT_AI, DEFAULT_ENEMY_AI, load_ai
+from snake.enemies import enemy_policy
+from snake.logic import SnakeGame
+from snake.replay import Replay
+from snake.telemetry import recording
+
+
+class GameTask(NamedTuple):
+    cfg: dict
+    seed: int
+    ai: str = DEFAULT_AI
+    enemy_ai: str = DEFAULT_ENEMY_AI
+    record: bool = False
+    timeout: Optional[float] = None  # per-move deadline for the player's AI
+    telemetry: bool = False
+
+
+class GameResult(NamedTuple):
+    seed: int
+    score: int
+    moves: int
+    seconds: float
+    enemy_scores: tuple
+    replay: Optional[Replay] = None
+    timeouts: int = 0
+    ai_seconds: float = 0.0  # time spent in the player's AI
+    telemetry: Optional[dict] = None  # engine counters, see snake.telemetry
+
+
+def play_game(cfg, seed=None, ai=None, enemy_ai=None):
+    """Plays a single headless game, returning the finished SnakeGame"""
+    ai = ai or load_ai(DEFAULT_AI)
+    enemy_turn = enemy_policy(enemy_ai or load_ai(DEFAULT_ENEMY_AI))
+
+    game = SnakeGame(
+        width=cfg["width"],
+        height=cfg["height"],
+        num_enemies=cfg["num_enemies"],
+        max_moves=cfg["max_moves"],
+        num_food=cfg["num_food"],
+        seed=seed,
+    )
+
+    while not game.game_over:
+        for i in range(len(game.snakes)):
+            if game.snakes[i].isAlive:
+                turn = ai(game.getGameState(i)) if i == 0 else enemy_turn(game, i)
+                game.move_snake(i, turn)
+
+    return game
+
+
+class _Timed:
+    # wraps an AI, adding up the time spent in it
+    def __init__(self, ai):
+        self.ai = ai
+        self.seconds = 0.0
+
+    def __call__(self, state):
+        start = time.perf_counter()
+        try:
+            return self.ai(state)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+@contextmanager
+def seeded_random(seed):
+    """Seeds the random module for a game's AIs, restoring the caller's state after"""
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(state)
+
+
+def run_task(task):
+    """
+    Plays the game described by a task, loading its AIs on first use.
+
+    The random module is seeded with the task's seed for the game, so AIs
+    that draw from it play the same way every time a seed is played.
+    """
+    if task.timeout is not None:
+        from snake.remote import remote_ai
+
+        ai = remote_ai(task.ai, task.timeout)
+        ai.seed(task.seed)
+        timeouts = ai.timeouts
+    else:
+        ai = load_ai(task.ai)
+
+    timed = _Timed(ai)
+    start = time.perf_counter()
+    telemetry_context = recording() if task.telemetry else nullcontext()
+    with seeded_random(task.seed), telemetry_context as telemetry:
+        game = play_game(task.cfg, seed=task.seed, ai=timed, enemy_ai=load_ai(task.enemy_ai))
+    return GameResult(
+        seed=task.seed,
+        score=game.snakes[0].score,
+        moves=game.moves,
+        seconds=time.perf_counter() - start,
+        enemy_scores=tuple(s.score for s in game.snakes[1:]),
+        replay=Replay.from_game(game) if task.record else None,
+        timeouts=ai.timeouts - timeouts if task.timeout is not None else 0,
+        ai_seconds=timed.seconds,
+        telemetry=telemetry.to_dict() if telemetry is not None else None,
+    )
+
+
+def _init_worker(preload):
+    # imports the AIs up front so the first game isn't charged for it
+    for spec in preload:
+        load_ai(spec)
+
+
+class GamePool:
+    def __init__(self, workers=1, preload=(DEFAULT_AI, DEFAULT_ENEMY_AI)):
+        """
+        Plays headless games, in this process or across long-lived worker processes.
+
+        Workers import each AI once and keep it for their lifetime, so any caches
+        an AI builds stay warm from one game (and difficulty) to the next.
+
+        Args:
+            workers: Number of worker processes, 1 plays games in this process
+            preload: AI specs every worker imports when it starts
+        """
+        self.workers = workers
+        self._executor = None
+
+        # loads here too, so a bad spec fails before any worker starts
+        for spec in preload:
+            load_ai(spec)
+
+        if workers > 1:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(tuple(preload),)
+            )
+
+    def play(self, tasks):
+        """Plays every task, yielding results in task order as they finish"""
+        if self._executor is None:
+            return map(run_task, tasks)
+
+        tasks = list(tasks)
+        chunksize = max(1, min(16, len(tasks) // (self.workers * 8)))
+        return self._executor.map(run_task, tasks, chunksize=chunksize)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
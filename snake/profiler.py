@@ -0,0 +1,147 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+from snake.test import run_no_viz
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# the parts of the project we attribute time to, matched against module names
+CATEGORIES = {
+    "myAI": "myAI",
+    # the flood fill myAI runs through (compiled or not)
+    "snake.accel": "myAI",
+    "examples.smartAI": "smartAI",
+    # smart_turn, which moves smartAI enemies straight from the game
+    "snake.enemies": "smartAI",
+    "snake.logic": "snake.logic",
+}
+
+
+def _module_name(filename):
+    """Turn a code object's filename into a dotted module name where possible"""
+    path = Path(filename)
+    try:
+        parts = path.resolve().relative_to(_PROJECT_ROOT).with_suffix("").parts
+    except ValueError:
+        return path.stem
+    return ".".join(parts)
+
+
+def _category(filename):
+    return CATEGORIES.get(_module_name(filename), "other")
+
+
+class StackSampler:
+    def __init__(self, thread_id, interval=0.001):
+        """
+        Periodically samples the call stack of a thread to build collapsed stacks.
+
+        Args:
+            thread_id: Identifier of the thread to sample
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _label(self, code):
+        """Label a code object as module:function, caching the result"""
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{_module_name(code.co_filename)}:{code.co_name}"
+            self._labels[code] = label
+        return label
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        """Writes stacks in the collapsed format used by flamegraph.pl and speedscope"""
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def attribute(stats):
+    """Sums the self time of every profiled function into its category"""
+    totals = Counter()
+    for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items():
+        totals[_category(filename)] += tottime
+    return totals
+
+
+def format_attribution(totals):
+    """Formats per-component self time as a small table"""
+    total = sum(totals.values()) or 1.0
+    lines = ["Self time by component:"]
+    # several modules can share a category, which is listed once
+    for name in [*dict.fromkeys(CATEGORIES.values()), "other"]:
+        seconds = totals.get(name, 0.0)
+        lines.append(f"  {name:<12} {seconds:8.3f}s  {100 * seconds / total:5.1f}%")
+    return "\n".join(lines)
+
+
+def profile(n, difficulty, DIFFICULTIES, output="profile", interval=0.001):
+    """Profile n headless games, writing <output>.txt and <output>.folded"""
+    cfg = DIFFICULTIES[difficulty]
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), interval)
+
+    print(f"Profiling {n} {difficulty} games...")
+    scores = []
+    sampler.start()
+    profiler.enable()
+    try:
+        for _ in range(n):
+            scores.append(run_no_viz(cfg))
+    finally:
+        profiler.disable()
+        sampler.stop()
+
+    stats = pstats.Stats(profiler)
+    totals = attribute(stats)
+
+    # builds the text summary, attribution first then the usual pstats listing
+    stream = io.StringIO()
+    average = sum(scores) / n
+    stream.write(f"Profile of {n} {difficulty} games (average score {average:.1f})\n\n")
+    stream.write(format_attribution(totals) + "\n\n")
+
+    stats.stream = stream
+    stats.sort_stats("cumulative").print_stats(40)
+    stats.sort_stats("tottime").print_stats(40)
+
+    summary_path = f"{output}.txt"
+    with open(summary_path, "w") as f:
+        f.write(stream.getvalue())
+
+    collapsed_path = f"{output}.folded"
+    sampler.write_collapsed(collapsed_path)
+
+    print("\n" + format_attribution(totals))
+    print(f"\nWrote {summary_path} and {collapsed_path}")
+
+    return totals
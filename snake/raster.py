@@ -0,0 +1,369 @@
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from snake import palette
+from snake.frame import Frame, unpack_cell
+
+# palette-indexed images keep frames small and map straight onto GIF colour tables
+COLORS = [
+    palette.BG_FRAME,
+    palette.BG_BOARD,
+    palette.CHECKER_LIGHT,
+    palette.WALL_COLOR,
+    palette.SNAKE_COLOR,
+    palette.ENEMY_COLOR,
+    palette.APPLE_RED,
+    palette.APPLE_GREEN,
+    palette.APPLE_HIGHLIGHT,
+    palette.APPLE_STEM,
+    palette.WHITE,
+    palette.BLACK,
+]
+(
+    FRAME,
+    BOARD,
+    CHECKER,
+    WALL,
+    SNAKE,
+    ENEMY,
+    APPLE,
+    LEAF,
+    HIGHLIGHT,
+    STEM,
+    EYE_WHITE,
+    EYE_BLACK,
+) = range(len(COLORS))
+
+# marks pixels a stamp leaves untouched
+CLEAR = 255
+
+RGB = np.zeros((256, 3), dtype=np.uint8)
+RGB[: len(COLORS)] = COLORS
+
+
+def _disc(size, cx, cy, radius):
+    """Mask of a filled circle within a size x size stamp"""
+    y, x = np.ogrid[:size, :size]
+    return (x - cx) ** 2 + (y - cy) ** 2 <= radius**2
+
+
+def _rounded_square(size, inset, radius):
+    """Mask of a square inset from the cell edges with rounded corners"""
+    y, x = np.ogrid[:size, :size]
+    lo, hi = inset + radius, size - 1 - inset - radius
+    dx = np.maximum(np.maximum(lo - x, x - hi), 0)
+    dy = np.maximum(np.maximum(lo - y, y - hi), 0)
+    inside = (x >= inset) & (x < size - inset) & (y >= inset) & (y < size - inset)
+    return inside & (dx**2 + dy**2 <= radius**2)
+
+
+class Rasterizer:
+    def __init__(self, cell_size=16, padding=None):
+        """
+        Draws frames into palette-indexed NumPy images without a window.
+
+        Mirrors SnakeRenderer's look (same palette, apples, eyed heads) at a
+        smaller default cell size, drawing each cell with precomputed stamps.
+
+        Args:
+            cell_size: Size of each grid cell in pixels
+            padding: Frame border in pixels, defaults to half a cell
+        """
+        self.cell_size = cell_size
+        self.padding = cell_size // 2 if padding is None else padding
+
+        # the board only changes with the walls, which frames share until they change
+        self._board_size = None
+        self._board_walls = None
+        self._board = None
+
+        self._build_stamps()
+
+    def _build_stamps(self):
+        cs = self.cell_size
+        inset = max(1, cs // 10)
+        centre = (cs - 1) / 2
+
+        def stamp(mask, color):
+            s = np.full((cs, cs), CLEAR, dtype=np.uint8)
+            s[mask] = color
+            return s
+
+        # apples with highlight, stem and leaf
+        radius = max(1, cs // 3)
+        apple = stamp(_disc(cs, centre, centre + 1, radius), APPLE)
+        shine = _disc(cs, centre - radius / 2, centre + 1 - radius / 2, max(1, radius // 3))
+        apple[shine] = HIGHLIGHT
+        top = max(0, int(centre + 1 - radius) - 1)
+        apple[max(0, top - 1) : top + 1, int(centre)] = STEM
+        apple[max(0, top - 1), int(centre) + 1 : int(centre) + 1 + max(1, cs // 8)] = LEAF
+        self.apple = apple
+
+        # snake bodies and tails as rounded squares in each colour
+        body = _rounded_square(cs, inset, max(1, cs // 8))
+        tail = _rounded_square(cs, inset, max(1, cs // 5))
+        self.body = {color: stamp(body, color) for color in (SNAKE, ENEMY)}
+        self.tail = {color: stamp(tail, color) for color in (SNAKE, ENEMY)}
+
+        # heads have eyes facing the direction of travel
+        head = _rounded_square(cs, inset, max(1, cs // 4))
+        eye, pupil = max(1, cs * 6 // 40), max(1, cs * 3 // 40)
+        near, far = inset + (cs - 2 * inset) / 3, inset + 2 * (cs - 2 * inset) / 3
+        eyes = {
+            0: [(near, near), (far, near)],  # Up
+            1: [(far, near), (far, far)],  # Right
+            2: [(near, far), (far, far)],  # Down
+            3: [(near, near), (near, far)],  # Left
+        }
+        self.head = {}
+        for color in (SNAKE, ENEMY):
+            for direction, positions in eyes.items():
+                s = stamp(head, color)
+                for ex, ey in positions:
+                    s[_disc(cs, ex, ey, eye)] = EYE_WHITE
+                for ex, ey in positions:
+                    s[_disc(cs, ex, ey, pupil)] = EYE_BLACK
+                self.head[color, direction] = s
+
+    def _cell_origin(self, cell, width):
+        x, y = unpack_cell(cell, width)
+        return self.padding + y * self.cell_size, self.padding + x * self.cell_size
+
+    def _stamp(self, image, cell, width, stamp):
+        top, left = self._cell_origin(cell, width)
+        region = image[top : top + self.cell_size, left : left + self.cell_size]
+        np.copyto(region, stamp, where=stamp != CLEAR)
+
+    def _board_image(self, frame: Frame):
+        """The frame, checkerboard and walls, cached until the walls change"""
+        size = (frame.width, frame.height)
+        if size == self._board_size and frame.walls is self._board_walls:
+            return self._board
+
+        cs, pad = self.cell_size, self.padding
+        board = np.full(
+            (frame.height * cs + 2 * pad, frame.width * cs + 2 * pad), FRAME, dtype=np.uint8
+        )
+        cells = board[pad : pad + frame.height * cs, pad : pad + frame.width * cs]
+        y, x = np.indices((frame.height, frame.width))
+        checker = np.where((x + y) % 2 == 0, CHECKER, BOARD).astype(np.uint8)
+        cells[:] = np.kron(checker, np.ones((cs, cs), dtype=np.uint8))
+
+        for cell in frame.walls:
+            top, left = self._cell_origin(cell, frame.width)
+            board[top : top + cs, left : left + cs] = WALL
+
+        self._board_size = size
+        self._board_walls = frame.walls
+        self._board = board
+        return board
+
+    def draw(self, frame: Frame):
+        """Draws a frame, returning a (height, width) array of palette indices"""
+        image = self._board_image(frame).copy()
+        width = frame.width
+
+        for cell in frame.food:
+            self._stamp(image, cell, width, self.apple)
+
+        # enemies first so the player's snake appears on top
+        for snake, color in [(e, ENEMY) for e in frame.enemies] + [(frame.snake, SNAKE)]:
+            if not snake.body or (color == ENEMY and not snake.isAlive):
+                continue
+            last = len(snake.body) - 1
+            for i in range(last, -1, -1):
+                if i == 0:
+                    stamp = self.head[color, snake.direction]
+                elif i == last:
+                    stamp = self.tail[color]
+                else:
+                    stamp = self.body[color]
+                self._stamp(image, snake.body[i], width, stamp)
+
+        return image
+
+
+def to_rgb(image):
+    """Converts a palette-indexed image to (height, width, 3) RGB"""
+    return RGB[image]
+
+
+def _png_chunk(kind, data):
+    chunk = kind + data
+    return struct.pack(">I", len(data)) + chunk + struct.pack(">I", zlib.crc32(chunk))
+
+
+def write_png(path, image):
+    """Writes a palette-indexed image as an RGB PNG"""
+    rgb = to_rgb(image)
+    height, width, _ = rgb.shape
+
+    # every scanline is prefixed with filter type 0 (none)
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgb.reshape(height, -1)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(_png_chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)))
+        f.write(_png_chunk(b"IEND", b""))
+
+
+def _lzw(pixels, min_code_size):
+    """GIF flavoured LZW compression of a sequence of palette indices"""
+    clear = 1 << min_code_size
+    end = clear + 1
+    code_size = min_code_size + 1
+    next_code = end + 1
+    table = {}
+
+    out = bytearray()
+    buffer = 0
+    bits = 0
+
+    def emit(code):
+        nonlocal buffer, bits, code_size
+        buffer |= code << bits
+        bits += code_size
+        while bits >= 8:
+            out.append(buffer & 0xFF)
+            buffer >>= 8
+            bits -= 8
+        # the decoder widens codes as soon as the table outgrows them
+        if next_code > (1 << code_size) - 1 and code_size < 12:
+            code_size += 1
+
+    emit(clear)
+    prefix = pixels[0]
+    for pixel in pixels[1:]:
+        key = (prefix << 8) | pixel
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+
+        emit(prefix)
+        if next_code < 4096:
+            table[key] = next_code
+            next_code += 1
+        else:
+            # the table is full so start again
+            emit(clear)
+            table.clear()
+            code_size = min_code_size + 1
+            next_code = end + 1
+        prefix = pixel
+
+    emit(prefix)
+    emit(end)
+    if bits:
+        out.append(buffer & 0xFF)
+    return bytes(out)
+
+
+def write_gif(path, images, fps=10):
+    """
+    Writes palette-indexed images as a looping animated GIF.
+
+    After the first frame only the bounding box of pixels that changed is
+    encoded, which keeps both the file and the (pure Python) encoding small.
+    """
+    images = list(images)
+    height, width = images[0].shape
+
+    table_bits = max(2, (len(COLORS) - 1).bit_length())
+    colors = np.zeros((1 << table_bits, 3), dtype=np.uint8)
+    colors[: len(COLORS)] = COLORS
+    delay = max(1, round(100 / fps))
+
+    with open(path, "wb") as f:
+        f.write(b"GIF89a")
+        f.write(struct.pack("<HHBBB", width, height, 0xF0 | (table_bits - 1), 0, 0))
+        f.write(colors.tobytes())
+
+        # loops forever
+        f.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+        previous = None
+        for image in images:
+            if previous is None:
+                top, left, bottom, right = 0, 0, height, width
+            else:
+                changed = image != previous
+                rows = np.flatnonzero(changed.any(axis=1))
+                cols = np.flatnonzero(changed.any(axis=0))
+                if len(rows) == 0:
+                    rows = cols = np.array([0])
+                top, bottom = rows[0], rows[-1] + 1
+                left, right = cols[0], cols[-1] + 1
+            previous = image
+
+            # graphic control extension: keep the previous frame underneath
+            f.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 0x04, delay, 0, 0))
+            f.write(struct.pack("<BHHHHB", 0x2C, left, top, right - left, bottom - top, 0))
+
+            f.write(bytes([table_bits]))
+            data = _lzw(image[top:bottom, left:right].ravel().tolist(), table_bits)
+            for i in range(0, len(data), 255):
+                block = data[i : i + 255]
+                f.write(bytes([len(block)]) + block)
+            f.write(b"\x00")
+
+        f.write(b"\x3b")
+
+
+def export_replay(replay, path, fmt="gif", cell_size=16, fps=10):
+    """
+    Renders a replay as an animated GIF at path, or as a directory of PNGs.
+
+    Returns:
+        The number of frames written
+    """
+    rasterizer = Rasterizer(cell_size)
+    images = [rasterizer.draw(frame) for frame in replay.frames()]
+
+    if fmt == "gif":
+        write_gif(path, images, fps)
+    elif fmt == "png":
+        os.makedirs(path, exist_ok=True)
+        for i, image in enumerate(images):
+            write_png(os.path.join(path, f"{i:05d}.png"), image)
+    else:
+        raise ValueError(f"unknown format {fmt!r}, expected gif or png")
+
+    return len(images)
+
+
+def export_replays(path, out_dir, games=None, fmt="gif", cell_size=16, fps=10, workers=1):
+    """
+    Renders replays from an archive file into out_dir, one clip per game.
+
+    Args:
+        path: Replay archive written by snake test --record
+        out_dir: Directory to write game_<index>.gif files (or PNG directories) to
+        games: Indices of the games to export, defaults to all of them
+        workers: Number of processes to render with
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    from snake.replay import read_replays
+
+    replays = read_replays(path)
+    games = range(len(replays)) if games is None else games
+    os.makedirs(out_dir, exist_ok=True)
+
+    jobs = []
+    for i in games:
+        target = os.path.join(out_dir, f"game_{i:05d}" + (".gif" if fmt == "gif" else ""))
+        jobs.append((replays[i], target, fmt, cell_size, fps))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = list(pool.map(export_replay, *zip(*jobs)))
+    else:
+        counts = [export_replay(*job) for job in jobs]
+
+    return dict(zip(games, counts))
@@ -0,0 +1,174 @@
+import logging
+import multiprocessing
+import random
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.util import Finalize
+
+from snake.ai import load_ai
+from snake.codec import decode_state, encode_state, state_size
+from snake.logic import Turn
+
+log = logging.getLogger(__name__)
+
+# children are spawned rather than forked, so they start clean whatever
+# threads (progress bars, pools) the harness has running
+_context = multiprocessing.get_context("spawn")
+
+
+def _serve(spec, shm_name, conn):
+    # runs in the child: loads the AI, then answers one state per message,
+    # apart from ("seed", n) messages, which seed the random module
+    ai = load_ai(spec)
+    shm = SharedMemory(name=shm_name)
+    conn.send("ready")
+    try:
+        while True:
+            message = conn.recv()
+            if not message:
+                break
+            if isinstance(message, tuple):
+                random.seed(message[1])
+                continue
+            try:
+                reply = ai(decode_state(shm.buf)).value
+            except Exception as e:
+                reply = f"{type(e).__name__}: {e}"
+            conn.send(reply)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        shm.close()
+
+
+class RemoteAI:
+    def __init__(self, spec, timeout, start_timeout=60.0):
+        """
+        Runs an AI in a child process, giving it a deadline for every move.
+
+        States are written to shared memory and the child is woken through a
+        pipe. An AI that misses the deadline, raises or crashes goes straight
+        and the miss is logged; a child that missed the deadline is killed and
+        a fresh one started before the next move, so one slow position can't
+        hold up the rest of the run.
+
+        The AI sees a decoded copy of the state (see snake.codec). Its food and
+        walls are sent and rebuilt in the game's iteration order, but a rebuilt
+        set can still iterate differently, so only AIs that don't depend on set
+        order are sure to pick the moves they would in-process (smartAI, which
+        aims for whichever food comes first, may not). Call seed() at the start of each game so AIs that use the
+        random module draw what they would in-process too.
+
+        Args:
+            spec: The AI as "module:function"
+            timeout: Seconds the AI has to answer each move
+            start_timeout: Seconds the child has to import the AI
+        """
+        self.spec = spec
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+
+        # moves that fell back to going straight
+        self.timeouts = 0
+        self.errors = 0
+
+        self._process = None
+        self._conn = None
+        self._shm = None
+        self._seed = None
+
+    def _start(self, size):
+        self._stop()
+        self._shm = SharedMemory(create=True, size=size)
+        self._conn, child_conn = _context.Pipe()
+        self._process = _context.Process(
+            target=_serve, args=(self.spec, self._shm.name, child_conn), daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+
+        # importing the AI doesn't count against the first move's deadline
+        if not self._conn.poll(self.start_timeout):
+            self._stop()
+            raise RuntimeError(f"{self.spec} took too long to start")
+        self._conn.recv()
+        if self._seed is not None:
+            self._conn.send(("seed", self._seed))
+
+    def _stop(self):
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.kill()
+            self._process.join()
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def seed(self, seed):
+        """Seeds the child's random module, as run_task seeds it in-process"""
+        self._seed = seed
+        if self._conn is not None:
+            try:
+                self._conn.send(("seed", seed))
+            except OSError:
+                self._stop()
+
+    def __call__(self, state):
+        size = state_size(state.width, state.height, 1 + len(state.enemies))
+        if self._process is None or self._shm.size < size:
+            self._start(size)
+
+        encode_state(state, self._shm.buf)
+
+        try:
+            self._conn.send(True)
+            if not self._conn.poll(self.timeout):
+                self.timeouts += 1
+                log.warning("%s missed the %gs deadline, going straight", self.spec, self.timeout)
+                self._stop()
+                return Turn.STRAIGHT
+            reply = self._conn.recv()
+        except (EOFError, OSError):
+            self.errors += 1
+            log.warning("%s crashed, going straight", self.spec)
+            self._stop()
+            return Turn.STRAIGHT
+
+        if isinstance(reply, str):
+            self.errors += 1
+            log.warning("%s raised %s, going straight", self.spec, reply)
+            return Turn.STRAIGHT
+        return Turn(reply)
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.send(False)
+            except OSError:
+                pass
+            self._process.join(1)
+        self._stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@lru_cache(maxsize=None)
+def remote_ai(spec, timeout):
+    """
+    Gets a RemoteAI for a spec, shared by every game this process plays.
+
+    The child is closed when the process exits, including pool workers, which
+    skip atexit handlers.
+    """
+    ai = RemoteAI(spec, timeout)
+    Finalize(ai, ai.close, exitpriority=10)
+    return ai
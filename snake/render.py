@@ -1,11 +1,22 @@
 import pyray as rl
 from snake.logic import GameState
+from snake.frame import Frame, FrameSnapshotter, unpack_cell
+from snake import palette
 from collections import deque
-import copy
+
+# below this cell size snakes and apples are drawn without details
+DETAIL_CELL_SIZE = 20
+
+
+def fit_cell_size(width, height, max_board=800, max_cell=40):
+    """Picks a cell size that fits a board on screen, shrinking cells for big boards"""
+    return max(2, min(max_cell, max_board // max(width, height)))
 
 
 class SnakeRenderer:
-    def __init__(self, cell_size=40, render_fps=60, moves_per_second=10):
+    def __init__(
+        self, cell_size=40, render_fps=60, moves_per_second=10, buffer_size=64
+    ):
         """
         Initialize the raylib renderer for Snake game with Google Snake theme and buffered smooth movement.
 
@@ -13,6 +24,7 @@ class SnakeRenderer:
             cell_size: Size of each grid cell in pixels
             render_fps: Target render frames per second
             moves_per_second: How many game moves to play per second
+            buffer_size: Most frames buffered ahead of playback, older ones are dropped
         """
         self.cell_size = cell_size
         self.render_fps = render_fps
@@ -21,8 +33,9 @@ class SnakeRenderer:
         self.padding = 20
         self.window_initialized = False
 
-        # State buffer for smooth playback
-        self.state_buffer = deque()
+        # State buffer for smooth playback, holding compact frame snapshots
+        self.snapshot = FrameSnapshotter()
+        self.state_buffer = deque(maxlen=buffer_size)
         self.current_state = None
         self.next_state = None
         self.interpolation_progress = 0.0
@@ -34,17 +47,24 @@ class SnakeRenderer:
         # Restart handling
         self.restart_requested = False
 
+        # Board, checkerboard and walls are drawn once into a texture, which is
+        # rebuilt only when the walls tuple (shared between frames) changes
+        self.static_layer = None
+        self.static_walls = None
+
         # Google Snake theme colors
-        self.BG_BOARD = rl.Color(170, 215, 81, 255)  # Light green board
-        self.BG_FRAME = rl.Color(87, 138, 52, 255)  # Dark green frame
-        self.CHECKER_LIGHT = rl.Color(162, 209, 73, 255)  # Lighter checker
-        self.SNAKE_COLOR = rl.Color(58, 103, 240, 255)  # Google blue snake
-        self.ENEMY_COLOR = rl.Color(231, 71, 71, 255)  # Red enemy snakes
-        self.APPLE_RED = rl.Color(231, 71, 71, 255)  # Bright red apple
-        self.APPLE_GREEN = rl.Color(100, 180, 50, 255)  # Green leaf
+        self.BG_BOARD = rl.Color(*palette.BG_BOARD, 255)
+        self.BG_FRAME = rl.Color(*palette.BG_FRAME, 255)
+        self.CHECKER_LIGHT = rl.Color(*palette.CHECKER_LIGHT, 255)
+        self.SNAKE_COLOR = rl.Color(*palette.SNAKE_COLOR, 255)
+        self.ENEMY_COLOR = rl.Color(*palette.ENEMY_COLOR, 255)
+        self.APPLE_RED = rl.Color(*palette.APPLE_RED, 255)
+        self.APPLE_GREEN = rl.Color(*palette.APPLE_GREEN, 255)
+        self.APPLE_HIGHLIGHT = rl.Color(*palette.APPLE_HIGHLIGHT, 255)
+        self.APPLE_STEM = rl.Color(*palette.APPLE_STEM, 255)
         self.WHITE = rl.WHITE
         self.BLACK = rl.BLACK
-        self.WALL_COLOR = rl.Color(87, 138, 52, 255)  # Dark green walls
+        self.WALL_COLOR = rl.Color(*palette.WALL_COLOR, 255)
 
     def _init_window(self, width, height):
         """Initialize the raylib window (done on first render)"""
@@ -70,26 +90,51 @@ class SnakeRenderer:
         Args:
             state: GameState object containing snake, food, walls, etc.
         """
+        self.push_frame(self.snapshot(state))
+
+        # Process buffered states and render
+        self._process_and_render()
+
+    def push_frame(self, frame: Frame):
+        """
+        Add an already snapshotted frame to the render buffer without drawing.
+
+        Args:
+            frame: Frame taken by a FrameSnapshotter
+        """
         # Initialize window on first render
         if not self.window_initialized:
-            self._init_window(state.width, state.height)
+            self._init_window(frame.width, frame.height)
 
-        # Add state to buffer (make a copy to avoid reference issues)
-        state_copy = self._copy_state(state)
-        self.state_buffer.append(state_copy)
+        # Frames are immutable so they can be buffered as they are
+        self.state_buffer.append(frame)
 
         # Initialize current state if needed
         if self.current_state is None:
             self.current_state = self.state_buffer.popleft()
-            self.prev_player_body = deque(self.current_state.snake.body)
-            # Store previous bodies by snake ID
-            self.prev_enemy_bodies = {}
-            for enemy in self.current_state.enemies:
-                if enemy is not None and enemy.body:
-                    self.prev_enemy_bodies[enemy.id] = deque(enemy.body)
+            self._store_prev_bodies()
 
-        # Process buffered states and render
-        self._process_and_render()
+    def show(self, current: Frame, next_frame: Frame = None, alpha=1.0, overlay=None):
+        """
+        Draw a given pair of frames, for callers that control playback themselves.
+
+        Args:
+            current: Frame to draw, or to interpolate from
+            next_frame: Frame to interpolate towards, if any
+            alpha: Interpolation progress between the two frames
+            overlay: Optional callable that draws on top of the frame
+        """
+        if not self.window_initialized:
+            self._init_window(current.width, current.height)
+
+        self.current_state = current
+        self._store_prev_bodies()
+        self.next_state = next_frame
+        self._render_frame(alpha if next_frame is not None else 1.0, overlay)
+
+    def has_capacity(self):
+        """Check if the buffer has room, so callers can avoid simulating too far ahead"""
+        return len(self.state_buffer) < self.state_buffer.maxlen
 
     def update(self):
         """
@@ -127,9 +172,18 @@ class SnakeRenderer:
             return True
         return not rl.window_should_close()
 
-    def _copy_state(self, state):
-        """Create a deep copy of the game state"""
-        return copy.deepcopy(state)
+    def _store_prev_bodies(self):
+        """Remember the current bodies (player + enemies by ID) to interpolate from"""
+        self.prev_player_body = self.current_state.snake.body
+        self.prev_enemy_bodies = {}
+        for enemy in self.current_state.enemies:
+            if enemy is not None and enemy.body:
+                self.prev_enemy_bodies[enemy.id] = enemy.body
+
+    def _cells(self, cells):
+        """Unpack a frame's packed cells into (x, y) positions"""
+        width = self.current_state.width
+        return [unpack_cell(cell, width) for cell in cells]
 
     def _process_and_render(self):
         """Process buffer and render the current interpolated frame"""
@@ -152,13 +206,7 @@ class SnakeRenderer:
             # If we've completed the interpolation, move to next state
             if self.interpolation_progress >= 1.0:
                 self.current_state = self.next_state
-                self.prev_player_body = deque(self.current_state.snake.body)
-
-                # Update previous enemy bodies by ID
-                self.prev_enemy_bodies = {}
-                for enemy in self.current_state.enemies:
-                    if enemy is not None and enemy.body:
-                        self.prev_enemy_bodies[enemy.id] = deque(enemy.body)
+                self._store_prev_bodies()
 
                 self.next_state = None
                 self.interpolation_progress = 0.0
@@ -174,7 +222,7 @@ class SnakeRenderer:
         # Render the current frame
         self._render_frame(alpha)
 
-    def _render_frame(self, alpha):
+    def _render_frame(self, alpha, overlay=None):
         """Render a single frame with interpolation"""
         # Use current state for rendering (or next if current is None)
         state = (
@@ -183,8 +231,59 @@ class SnakeRenderer:
         if state is None:
             return
 
+        # Rebuilds the static layer if the walls have changed
+        if self.static_layer is None or state.walls is not self.static_walls:
+            self._build_static_layer(state)
+
         rl.begin_drawing()
 
+        # Frame, board, checkerboard and walls in one blit
+        # (render textures are stored upside down, hence the negative height)
+        rl.draw_texture_rec(
+            self.static_layer.texture,
+            rl.Rectangle(0, 0, self.window_width, -self.window_height),
+            rl.Vector2(0, 0),
+            rl.WHITE,
+        )
+
+        # Food (apples with details)
+        for fx, fy in self._cells(state.food):
+            self._draw_apple(fx, fy)
+
+        # Draw enemy snakes first (so player snake appears on top)
+        self._draw_enemy_snakes_smooth(alpha)
+
+        # Draw player snake
+        self._draw_player_snake_smooth(alpha)
+
+        # UI elements (Google Snake style)
+        self._draw_ui(state)
+
+        # Game over overlay
+        if not state.snake.isAlive:
+            self._draw_game_over(state)
+
+        # Anything the caller wants drawn on top
+        if overlay is not None:
+            overlay()
+
+        # Buffer indicator (optional debug info)
+        # buffer_text = f"Buffer: {len(self.state_buffer)}"
+        # rl.draw_text(buffer_text, self.window_width - 150, self.window_height - 30, 16,
+        #            rl.Color(255, 255, 255, 150))
+
+        rl.end_drawing()
+
+    def _build_static_layer(self, state):
+        """Draw the parts of the scene that only change with the walls into a texture"""
+        if self.static_layer is None:
+            self.static_layer = rl.load_render_texture(
+                self.window_width, self.window_height
+            )
+        self.static_walls = state.walls
+
+        rl.begin_texture_mode(self.static_layer)
+
         # Dark green frame background
         rl.clear_background(self.BG_FRAME)
 
@@ -206,36 +305,14 @@ class SnakeRenderer:
                     )
 
         # Walls (dark green squares)
-        for x, y in state.walls:
+        for x, y in self._cells(state.walls):
             wall_x = self.padding + x * self.cell_size
             wall_y = self.padding + y * self.cell_size
             rl.draw_rectangle(
                 wall_x, wall_y, self.cell_size, self.cell_size, self.WALL_COLOR
             )
 
-        # Food (apples with details)
-        for fx, fy in state.food:
-            self._draw_apple(fx, fy)
-
-        # Draw enemy snakes first (so player snake appears on top)
-        self._draw_enemy_snakes_smooth(alpha)
-
-        # Draw player snake
-        self._draw_player_snake_smooth(alpha)
-
-        # UI elements (Google Snake style)
-        self._draw_ui(state)
-
-        # Game over overlay
-        if not state.snake.isAlive:
-            self._draw_game_over(state)
-
-        # Buffer indicator (optional debug info)
-        # buffer_text = f"Buffer: {len(self.state_buffer)}"
-        # rl.draw_text(buffer_text, self.window_width - 150, self.window_height - 30, 16,
-        #            rl.Color(255, 255, 255, 150))
-
-        rl.end_drawing()
+        rl.end_texture_mode()
 
     def _draw_player_snake_smooth(self, alpha):
         """Draw player snake with smooth interpolation between current and next state"""
@@ -243,14 +320,14 @@ class SnakeRenderer:
             return
 
         # Always draw player snake even if dead (for game over screen)
-        curr_body = list(self.current_state.snake.body)
+        curr_body = self._cells(self.current_state.snake.body)
 
         # If we have a next state, interpolate towards it
         if self.next_state is not None and self.next_state.snake.body:
             prev_body = (
-                list(self.prev_player_body) if self.prev_player_body else curr_body
+                self._cells(self.prev_player_body) if self.prev_player_body else curr_body
             )
-            next_body = list(self.next_state.snake.body)
+            next_body = self._cells(self.next_state.snake.body)
 
             # Ensure bodies match length
             while len(prev_body) < len(next_body):
@@ -311,7 +388,7 @@ class SnakeRenderer:
             if not curr_enemy.isAlive:
                 continue
 
-            curr_body = list(curr_enemy.body)
+            curr_body = self._cells(curr_enemy.body)
             snake_id = curr_enemy.id
 
             # Check if this snake exists in next state
@@ -321,8 +398,10 @@ class SnakeRenderer:
                     next_enemy = next_enemies_by_id[snake_id]
 
                     # Get previous body for this snake ID
-                    prev_body = list(self.prev_enemy_bodies.get(snake_id, curr_body))
-                    next_body = list(next_enemy.body)
+                    prev_body = self._cells(
+                        self.prev_enemy_bodies.get(snake_id, curr_enemy.body)
+                    )
+                    next_body = self._cells(next_enemy.body)
 
                     # Ensure bodies match length
                     while len(prev_body) < len(next_body):
@@ -391,7 +470,10 @@ class SnakeRenderer:
 
     def _draw_segment_smooth(self, x, y, is_head, direction, is_tail, color):
         """Draw a snake segment at interpolated position (x, y can be floats)"""
-        size = self.cell_size - 8
+        if self.cell_size >= DETAIL_CELL_SIZE:
+            size = self.cell_size - 8
+        else:
+            size = max(1, self.cell_size - 2)
         cx = self.padding + x * self.cell_size + self.cell_size // 2
         cy = self.padding + y * self.cell_size + self.cell_size // 2
         px = int(cx - size / 2)
@@ -399,6 +481,8 @@ class SnakeRenderer:
 
         if is_head:
             rl.draw_rectangle_rounded(rl.Rectangle(px, py, size, size), 0.5, 8, color)
+            if self.cell_size < DETAIL_CELL_SIZE:
+                return
 
             # Draw eyes based on direction (with alpha support for fading)
             eye_size = 6
@@ -439,13 +523,15 @@ class SnakeRenderer:
         radius = self.cell_size // 3
 
         # Main apple body
-        rl.draw_circle(cx, cy, radius, self.APPLE_RED)
+        rl.draw_circle(cx, cy, max(1, radius), self.APPLE_RED)
+        if self.cell_size < DETAIL_CELL_SIZE:
+            return
 
         # Highlight
-        rl.draw_circle(cx - 5, cy - 5, radius // 3, rl.Color(255, 180, 180, 255))
+        rl.draw_circle(cx - 5, cy - 5, radius // 3, self.APPLE_HIGHLIGHT)
 
         # Stem
-        rl.draw_rectangle(cx - 1, cy - radius - 5, 3, 6, rl.Color(139, 69, 19, 255))
+        rl.draw_rectangle(cx - 1, cy - radius - 5, 3, 6, self.APPLE_STEM)
 
         # Leaf (simple triangle)
         rl.draw_triangle(
@@ -459,8 +545,8 @@ class SnakeRenderer:
         """Draw UI elements (score and snake length) in Google Snake style"""
         # Apple icon and score
         rl.draw_circle(40, 35, 12, self.APPLE_RED)
-        rl.draw_circle(37, 32, 4, rl.Color(255, 180, 180, 255))  # highlight
-        rl.draw_rectangle(38, 22, 3, 6, rl.Color(139, 69, 19, 255))  # stem
+        rl.draw_circle(37, 32, 4, self.APPLE_HIGHLIGHT)  # highlight
+        rl.draw_rectangle(38, 22, 3, 6, self.APPLE_STEM)  # stem
         rl.draw_text(f"{state.snake.score}", 60, 25, 28, self.WHITE)
 
     def _draw_game_over(self, state):
@@ -517,6 +603,10 @@ class SnakeRenderer:
     def close(self):
         """Close the raylib window"""
         if self.window_initialized:
+            if self.static_layer is not None:
+                rl.unload_render_texture(self.static_layer)
+                self.static_layer = None
+                self.static_walls = None
             rl.close_window()
             self.window_initialized = False
 
@@ -0,0 +1,252 @@
+import struct
+from dataclasses import dataclass
+
+from snake.frame import FrameSnapshotter
+from snake.logic import SnakeGame, Turn
+
+# turns are recorded as turn.value + 1, so they index this list
+TURNS = [Turn.LEFT, Turn.STRAIGHT, Turn.RIGHT]
+
+MAGIC = b"SNKR"
+VERSION = 1
+
+# magic, version, seed, width, height, num_enemies, num_food, max_moves, num_turns
+_HEADER = struct.Struct("<4sBQHHHHII")
+
+
+def pack_turns(turns):
+    """Packs turns (values 0-2) four to a byte"""
+    packed = bytearray((len(turns) + 3) // 4)
+    for i, turn in enumerate(turns):
+        packed[i >> 2] |= turn << ((i & 3) << 1)
+    return bytes(packed)
+
+
+def unpack_turns(packed, count):
+    """Inverse of pack_turns"""
+    turns = bytearray(count)
+    for i in range(count):
+        turns[i] = (packed[i >> 2] >> ((i & 3) << 1)) & 3
+    return bytes(turns)
+
+
+def advance(game, turns, k):
+    """Plays one tick of recorded turns starting at offset k, returning the new offset"""
+    # mirrors the harness loop, so the turns are consumed in recorded order
+    for i in range(len(game.snakes)):
+        if k >= len(turns):
+            break
+        if game.snakes[i].isAlive:
+            game.move_snake(i, TURNS[turns[k]])
+            k += 1
+    return k
+
+
+@dataclass(frozen=True)
+class Replay:
+    seed: int
+    width: int
+    height: int
+    num_enemies: int
+    num_food: int
+    max_moves: int
+    turns: bytes
+
+    @classmethod
+    def from_game(cls, game: SnakeGame):
+        """Records the replay of a game played so far"""
+        return cls(
+            seed=game.seed,
+            width=game.width,
+            height=game.height,
+            num_enemies=game.num_enemies,
+            num_food=game.num_food,
+            max_moves=game.max_moves,
+            turns=bytes(game.turns),
+        )
+
+    @property
+    def config(self):
+        return {
+            "width": self.width,
+            "height": self.height,
+            "num_enemies": self.num_enemies,
+            "num_food": self.num_food,
+            "max_moves": self.max_moves,
+        }
+
+    def to_bytes(self):
+        header = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            self.seed,
+            self.width,
+            self.height,
+            self.num_enemies,
+            self.num_food,
+            self.max_moves,
+            len(self.turns),
+        )
+        return header + pack_turns(self.turns)
+
+    @classmethod
+    def from_bytes(cls, data, offset=0):
+        """Decodes a replay, returning it and the offset just past it"""
+        (
+            magic,
+            version,
+            seed,
+            width,
+            height,
+            num_enemies,
+            num_food,
+            max_moves,
+            num_turns,
+        ) = _HEADER.unpack_from(data, offset)
+        if magic != MAGIC:
+            raise ValueError("not a snake replay")
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+
+        start = offset + _HEADER.size
+        end = start + (num_turns + 3) // 4
+        replay = cls(
+            seed=seed,
+            width=width,
+            height=height,
+            num_enemies=num_enemies,
+            num_food=num_food,
+            max_moves=max_moves,
+            turns=unpack_turns(data[start:end], num_turns),
+        )
+        return replay, end
+
+    def new_game(self):
+        return SnakeGame(seed=self.seed, **self.config)
+
+    def ticks(self):
+        """
+        Re-simulates the game without calling any AI, yielding it after every tick.
+
+        The same SnakeGame is yielded each time, so copy anything you keep.
+        """
+        game = self.new_game()
+        k = 0
+        while not game.game_over and k < len(self.turns):
+            k = advance(game, self.turns, k)
+            yield game
+
+    def simulate(self, tick=None):
+        """
+        Re-simulates the game without calling any AI.
+
+        Args:
+            tick: Stop once the player has made this many moves (None plays to the end)
+
+        Returns:
+            The SnakeGame at that point
+        """
+        game = None
+        if tick is None or tick > 0:
+            for game in self.ticks():
+                if tick is not None and game.moves >= tick:
+                    break
+        return game if game is not None else self.new_game()
+
+    def frames(self):
+        """Yields a render Frame of the player's view after every tick"""
+        snapshot = FrameSnapshotter()
+        for game in self.ticks():
+            yield snapshot(game.getGameState(0))
+
+
+class KeyframeIndex:
+    def __init__(self, replay, interval=50):
+        """
+        Seekable view of a replay.
+
+        One pass over the game stores the whole engine (SnakeGame.to_bytes)
+        every `interval` ticks; the recorded turns are the deltas in between,
+        so any tick is at most `interval - 1` re-simulated ticks from a keyframe.
+
+        Args:
+            replay: The Replay to index
+            interval: Ticks between keyframes
+        """
+        self.replay = replay
+        self.interval = interval
+        self.keyframes = []
+
+        game = replay.new_game()
+        k = 0
+        while True:
+            if game.moves == len(self.keyframes) * interval:
+                self.keyframes.append((k, game.to_bytes()))
+            if game.game_over or k >= len(replay.turns):
+                break
+            k = advance(game, replay.turns, k)
+
+        self.num_ticks = game.moves
+
+        # the most recently seeked game, so playing forwards is one tick at a time
+        self._game = None
+        self._offset = 0
+
+    def seek(self, tick):
+        """
+        Gets the game as it was after a tick.
+
+        The returned SnakeGame is reused by later seeks, so copy anything you keep.
+        """
+        tick = max(0, min(tick, self.num_ticks))
+        game = self._game
+
+        # starts again from the nearest keyframe unless we can just step forwards
+        if game is None or not (game.moves <= tick < game.moves + self.interval):
+            # decodes over the last game, reusing its snakes and sets
+            self._offset, keyframe = self.keyframes[tick // self.interval]
+            game = SnakeGame.from_bytes(keyframe, into=game)
+
+        while game.moves < tick and self._offset < len(self.replay.turns):
+            self._offset = advance(game, self.replay.turns, self._offset)
+
+        self._game = game
+        return game
+
+
+def write_replays(path, replays):
+    """Appends replays to an archive file"""
+    with open(path, "ab") as f:
+        for replay in replays:
+            f.write(replay.to_bytes())
+
+
+def read_replays(path):
+    """Reads every replay in an archive file"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    replays = []
+    offset = 0
+    while offset < len(data):
+        replay, offset = Replay.from_bytes(data, offset)
+        replays.append(replay)
+    return replays
+
+
+def format_board(game):
+    """Draws the board as text: 0-9 snake heads, lowercase bodies, * food, # walls"""
+    grid = [["." for _ in range(game.width)] for _ in range(game.height)]
+    for x, y in game.walls:
+        grid[y][x] = "#"
+    for x, y in game.food:
+        grid[y][x] = "*"
+    for snake in game.snakes:
+        if not snake.isAlive and snake.id != 0:
+            continue
+        body = "o" if snake.id == 0 else "x"
+        for x, y in list(snake.body)[1:]:
+            grid[y][x] = body
+        x, y = snake.head
+        grid[y][x] = str(snake.id % 10)
+    return "\n".join("".join(row) for row in grid)
@@ -1,46 +1,149 @@
+import queue
+import threading
+
+from snake.ai import DEFAULT_AI, DEFAULT_ENEMY_AI, load_ai
+from snake.enemies import enemy_policy
+from snake.frame import FrameSnapshotter
 from snake.logic import SnakeGame
-from snake.render import SnakeRenderer
+from snake.render import SnakeRenderer, fit_cell_size
+
+
+class Simulation(threading.Thread):
+    def __init__(self, cfg, ai, enemy_ai, queue_size=64):
+        """
+        Plays the game on a background thread, queueing frames ahead of playback.
+
+        Frames are tagged with a generation that increases on every restart,
+        so the renderer can drop frames left over from the previous game.
+
+        Args:
+            cfg: Difficulty config
+            ai: The player's AI function
+            enemy_ai: The enemies' AI function
+            queue_size: Most frames to simulate ahead of the renderer
+        """
+        super().__init__(daemon=True)
+        self.ai = ai
+        self.enemy_turn = enemy_policy(enemy_ai)
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.snapshot = FrameSnapshotter()
+        self.error = None
+
+        # creates a new snake game
+        self.game = SnakeGame(
+            width=cfg["width"],
+            height=cfg["height"],
+            num_enemies=cfg["num_enemies"],
+            max_moves=cfg["max_moves"],
+            num_food=cfg["num_food"],
+        )
+
+        self.generation = 0
+        self._requested_generation = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def restart(self):
+        """Asks for a new game, returning the generation its frames will carry"""
+        with self._lock:
+            self._requested_generation += 1
+            return self._requested_generation
+
+    def stop(self):
+        self._stopped.set()
+
+    def _tick(self):
+        # moves all the snakes one by one
+        # note that the player's snake is at index 0
+        game = self.game
+        for i in range(len(game.snakes)):
+            if game.snakes[i].isAlive:
+                turn = self.ai(game.getGameState(i)) if i == 0 else self.enemy_turn(game, i)
+                game.move_snake(i, turn)
 
-from myAI import myAI
-from examples.smartAI import smartAI as enemyAI
+    def _restart_pending(self):
+        return self._requested_generation != self.generation
 
+    def run(self):
+        try:
+            while not self._stopped.is_set():
 
-def run(cfg):
-    # creates a new snake game
-    game = SnakeGame(
-        width=cfg["width"],
-        height=cfg["height"],
-        num_enemies=cfg["num_enemies"],
-        max_moves=cfg["max_moves"],
-        num_food=cfg["num_food"],
+                # handles restarts here, so only this thread touches the game
+                if self._restart_pending():
+                    with self._lock:
+                        self.generation = self._requested_generation
+                    self.game.reset()
+
+                # nothing to simulate until the game is restarted
+                if self.game.game_over:
+                    self._stopped.wait(0.05)
+                    continue
+
+                self._tick()
+                item = (self.generation, self.snapshot(self.game.getGameState(0)))
+
+                # waits for room in the queue, giving up on a restart or stop
+                while not self._stopped.is_set() and not self._restart_pending():
+                    try:
+                        self.frames.put(item, timeout=0.05)
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            self.error = e
+
+
+def run(cfg, ai=DEFAULT_AI, enemy_ai=DEFAULT_ENEMY_AI, timeout=None):
+    # loads the AIs from their module:function specs
+    # with a timeout the player's AI runs in its own process with a deadline per move
+    if timeout is not None:
+        from snake.remote import remote_ai
+
+        player_ai = remote_ai(ai, timeout)
+    else:
+        player_ai = load_ai(ai)
+    sim = Simulation(cfg, player_ai, load_ai(enemy_ai))
+
+    # creates a new snake renderer, with smaller cells for big boards
+    render = SnakeRenderer(
+        cell_size=fit_cell_size(cfg["width"], cfg["height"]),
+        moves_per_second=cfg["moves_per_second"],
     )
 
-    # creates a new snake renderer
-    render = SnakeRenderer(moves_per_second=cfg["moves_per_second"])
+    # the simulation runs ahead on its own thread, so a slow AI never stalls drawing
+    sim.start()
+    generation = 0
 
     # main loop runs whilst the main window is open
     while render.is_window_open():
 
         # handles reset input
         if render.should_restart():
-            game.reset()
+            generation = sim.restart()
             render.reset()
 
-        # if the game is not over
-        if not game.game_over:
+        # moves frames from the simulation into the renderer while it has room
+        # (blocking briefly until the first frame opens the window)
+        while render.has_capacity():
+            try:
+                frame_generation, frame = sim.frames.get(
+                    block=not render.window_initialized, timeout=0.1
+                )
+            except queue.Empty:
+                break
+            if frame_generation == generation:
+                render.push_frame(frame)
 
-            # moves all the snakes one by one
-            # note that the player's snake is at index 0
-            for i in range(len(game.snakes)):
-                if game.snakes[i].isAlive:
-                    state = game.getGameState(i)
-                    turn = myAI(state) if i == 0 else enemyAI(state)
-                    game.move_snake(i, turn)
-
-            # gives the processed frame to the renered
-            render.push(game.getGameState(0))
+        if sim.error is not None:
+            raise sim.error
 
         # updates the renderer
         render.update()
 
-    print(f"Final score: {game.snakes[0].score}")
+    sim.stop()
+    sim.join()
+
+    # the simulation may have played on past what was shown, so the score
+    # comes from the last frame drawn rather than the game
+    shown = render.current_state
+    print(f"Final score: {shown.snake.score if shown is not None else 0}")
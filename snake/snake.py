@@ -1,17 +1,14 @@
 import argparse
 import random
-import yaml
-import copy
-from tqdm import tqdm
-from snake.logic import SnakeGame, GameState
-from snake.render import SnakeRenderer
 
-from snake.run import run
-from snake.test import test, test_all
+from snake.ai import DEFAULT_AI, DEFAULT_ENEMY_AI
+from snake.config import load_config
+
+# note that commands import what they need when they run, so headless
+# commands never pay for raylib (or tqdm when they don't show progress)
 
 # loads configurations
-with open("snake/difficulties.yaml", "r") as f:
-    CONFIG = yaml.safe_load(f)
+CONFIG = load_config()
 
 # gets the difficulties, defaulting to medium
 DIFFICULTIES = CONFIG["difficulties"]
@@ -22,8 +19,9 @@ def list_modes():
     """List all available modes"""
     print("\nAvailable modes:")
     for name, cfg in DIFFICULTIES.items():
+        stress = " (stress test)" if cfg.get("stress") else ""
         print(
-            f"  {name:<12} - {cfg['width']}x{cfg['height']} board, {cfg['num_enemies']} enemies"
+            f"  {name:<12} - {cfg['width']}x{cfg['height']} board, {cfg['num_enemies']} enemies{stress}"
         )
 
 
@@ -35,12 +33,121 @@ def main():
     run_parser = subparsers.add_parser("run")
     run_parser.add_argument("difficulty", nargs="?", default=DEFAULT)
     run_parser.add_argument("--seed", type=int)
+    run_parser.add_argument("--ai", default=DEFAULT_AI, metavar="module:function")
+    run_parser.add_argument("--enemy-ai", default=DEFAULT_ENEMY_AI, metavar="module:function")
+    run_parser.add_argument("--replay", help="view a game recorded with snake test --record")
+    run_parser.add_argument("--game", type=int, default=0)
+    run_parser.add_argument("--timeout", type=float, help="seconds per move for --ai")
 
     # snake test <n> [difficulty]
     test_parser = subparsers.add_parser("test")
     test_parser.add_argument("n", type=int)
     test_parser.add_argument("difficulty", nargs="?", default=DEFAULT)
     test_parser.add_argument("--seed", type=int)
+    test_parser.add_argument("--record", help="append replays of every game to this file")
+    test_parser.add_argument("--ai", default=DEFAULT_AI, metavar="module:function")
+    test_parser.add_argument("--enemy-ai", default=DEFAULT_ENEMY_AI, metavar="module:function")
+    test_parser.add_argument("--workers", type=int, default=1)
+    test_parser.add_argument("--timeout", type=float, help="seconds per move for --ai")
+    test_parser.add_argument("--no-cache", action="store_true", help="replay every game")
+    test_parser.add_argument(
+        "--telemetry", action="store_true", help="count what the engine does and print it"
+    )
+    test_parser.add_argument("--archive", help="add every game's ticks to this tick archive")
+    test_parser.add_argument(
+        "--coordinate", metavar="[host:]port", help="hand games out to snake worker processes"
+    )
+    test_parser.add_argument("--local-workers", type=int, default=0, help="with --coordinate")
+    test_parser.add_argument("--unit-size", type=int, default=10, help="games per work unit")
+    test_parser.add_argument("--lease", type=float, default=300, help="seconds per work unit")
+    test_parser.add_argument(
+        "--idle-timeout", type=float, default=600, help="seconds to wait for a worker"
+    )
+
+    # snake worker <host:port>
+    worker_parser = subparsers.add_parser("worker")
+    worker_parser.add_argument("address", metavar="host:port")
+    worker_parser.add_argument("--workers", type=int, default=1)
+    worker_parser.add_argument(
+        "--retry", type=float, default=30, help="seconds to keep trying to reach the coordinator"
+    )
+
+    # snake generate [difficulty]
+    generate_parser = subparsers.add_parser("generate")
+    generate_parser.add_argument("difficulty", nargs="?", default=DEFAULT)
+    generate_parser.add_argument("--games", type=int, default=100)
+    generate_parser.add_argument("--output", default="dataset")
+    generate_parser.add_argument("--seed", type=int)
+    generate_parser.add_argument("--ai", default=DEFAULT_AI, metavar="module:function")
+    generate_parser.add_argument("--enemy-ai", default=DEFAULT_ENEMY_AI, metavar="module:function")
+    generate_parser.add_argument("--workers", type=int)
+    generate_parser.add_argument("--shard-size", type=int, default=50_000, help="ticks per shard")
+    generate_parser.add_argument("--queue", type=int, help="most games waiting to be written")
+    generate_parser.add_argument("--egocentric", action="store_true")
+
+    # snake profile [difficulty]
+    profile_parser = subparsers.add_parser("profile")
+    profile_parser.add_argument("difficulty", nargs="?", default=DEFAULT)
+    profile_parser.add_argument("--games", type=int, default=10)
+    profile_parser.add_argument("--output", default="profile")
+    profile_parser.add_argument("--seed", type=int)
+
+    # snake tournament <ai> <ai> [ai ...]
+    tournament_parser = subparsers.add_parser("tournament")
+    tournament_parser.add_argument("ais", nargs="+", metavar="module:function")
+    tournament_parser.add_argument("--difficulty", default="hard")
+    tournament_parser.add_argument("--games", type=int, default=10)
+    tournament_parser.add_argument("--workers", type=int)
+    tournament_parser.add_argument("--seed", type=int)
+
+    # snake compare <old> <new> [difficulty]
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("old", metavar="module:function")
+    compare_parser.add_argument("new", metavar="module:function")
+    compare_parser.add_argument("difficulty", nargs="?", default=DEFAULT)
+    compare_parser.add_argument("--games", type=int, default=1000, help="most seeds to play")
+    compare_parser.add_argument("--batch", type=int, default=50, help="seeds between checks")
+    compare_parser.add_argument("--alpha", type=float, default=0.05)
+    compare_parser.add_argument("--enemy-ai", metavar="module:function")
+    compare_parser.add_argument("--workers", type=int, default=1)
+    compare_parser.add_argument("--seed", type=int)
+    compare_parser.add_argument("--no-cache", action="store_true", help="replay every game")
+
+    # snake sweep [--width a:b[:step]] [--num-enemies a,b,c] ...
+    sweep_parser = subparsers.add_parser("sweep")
+    sweep_parser.add_argument("--base", default=DEFAULT, help="difficulty for unswept values")
+    for param in ["width", "height", "num_enemies", "num_food", "max_moves"]:
+        sweep_parser.add_argument("--" + param.replace("_", "-"), metavar="a:b[:step]")
+    sweep_parser.add_argument("--games", type=int, default=10)
+    sweep_parser.add_argument("--output", default="sweep.csv")
+    sweep_parser.add_argument("--ai", default=DEFAULT_AI, metavar="module:function")
+    sweep_parser.add_argument("--enemy-ai", default=DEFAULT_ENEMY_AI, metavar="module:function")
+    sweep_parser.add_argument("--workers", type=int)
+    sweep_parser.add_argument("--seed", type=int)
+    sweep_parser.add_argument("--no-cache", action="store_true", help="replay every game")
+
+    # snake replay <file> [--game i] [--tick t]
+    replay_parser = subparsers.add_parser("replay")
+    replay_parser.add_argument("file")
+    replay_parser.add_argument("--game", type=int)
+    replay_parser.add_argument("--tick", type=int)
+
+    # snake export <file> <out_dir> [--games i j ...]
+    export_parser = subparsers.add_parser("export")
+    export_parser.add_argument("file")
+    export_parser.add_argument("out_dir")
+    export_parser.add_argument("--games", type=int, nargs="+")
+    export_parser.add_argument("--format", choices=["gif", "png"], default="gif")
+    export_parser.add_argument("--cell-size", type=int, default=16)
+    export_parser.add_argument("--fps", type=int, default=10)
+    export_parser.add_argument("--workers", type=int, default=1)
+
+    # snake bench [--ticks t]
+    bench_parser = subparsers.add_parser("bench")
+    bench_parser.add_argument("--ticks", type=int, default=200)
+    bench_parser.add_argument("--ai", default=DEFAULT_ENEMY_AI, metavar="module:function")
+    bench_parser.add_argument("--enemy-ai", default=DEFAULT_ENEMY_AI, metavar="module:function")
+    bench_parser.add_argument("--seed", type=int)
 
     # snake list
     subparsers.add_parser("list")
@@ -54,30 +161,313 @@ def main():
         return
 
     # Set seed if provided
-    if hasattr(args, "seed") and args.seed:
+    if hasattr(args, "seed") and args.seed is not None:
         random.seed(args.seed)
 
     # user has asked to run a game
-    if args.command == "run":
+    if args.command == "run" and args.replay:
+        from snake.replay import read_replays
+        from snake.viewer import ReplayViewer
+
+        replay = read_replays(args.replay)[args.game]
+        cfg = DIFFICULTIES.get(args.difficulty, {})
+
+        print("Controls: SPACE=play/pause, LEFT/RIGHT=step, UP/DOWN=speed,")
+        print("          HOME/END=jump, drag the timeline to scrub, ESC=quit")
+        ReplayViewer(replay, moves_per_second=cfg.get("moves_per_second", 10)).run()
+
+    elif args.command == "run":
         if args.difficulty not in DIFFICULTIES:
             print(f"Unknown difficulty: {args.difficulty}")
             list_modes()
             return
 
+        from snake.run import run
+
         print("Controls: R=restart, ESC=quit")
-        run(cfg=DIFFICULTIES[args.difficulty])
+        run(
+            cfg=DIFFICULTIES[args.difficulty],
+            ai=args.ai,
+            enemy_ai=args.enemy_ai,
+            timeout=args.timeout,
+        )
 
     # user has asked to test their AI
     elif args.command == "test":
-        if args.difficulty == "all":
-            test_all(args.n, DIFFICULTIES)
+        if args.difficulty != "all" and args.difficulty not in DIFFICULTIES:
+            print(f"Unknown difficulty: {args.difficulty}")
+            list_modes()
+            return
+
+        # workers only play games on this machine, coordinated ones are started
+        # with --local-workers
+        if args.coordinate and args.workers != 1:
+            parser.error("use --local-workers rather than --workers with --coordinate")
+
+        from contextlib import nullcontext
+
+        from snake.pool import GamePool
+        from snake.test import test, test_all
 
-        elif args.difficulty not in DIFFICULTIES:
+        # games are only worth caching when their seeds can come round again,
+        # and cached games have no telemetry to report
+        cache = None
+        if args.seed is not None and not args.no_cache and not args.telemetry:
+            from snake.cache import ResultCache
+
+            cache = ResultCache()
+
+        telemetry = None
+        if args.telemetry:
+            from snake.telemetry import Telemetry
+
+            telemetry = Telemetry()
+
+        archive = None
+        if args.archive:
+            from snake.archive import TickArchiveWriter
+
+            archive = TickArchiveWriter(args.archive)
+
+        # hands the games out to workers on other machines instead of a local pool
+        coordinator = None
+        if args.coordinate:
+            from snake.distributed import Coordinator, parse_address
+
+            try:
+                address = parse_address(args.coordinate)
+            except ValueError as e:
+                parser.error(str(e))
+            coordinator = Coordinator(
+                address,
+                unit_size=args.unit_size,
+                lease=args.lease,
+                local_workers=args.local_workers,
+                idle_timeout=args.idle_timeout,
+            )
+            host, port = coordinator.address
+            print(f"Coordinating on {host}:{port}, start workers with: snake worker HOST:{port}")
+
+        try:
+            if args.difficulty == "all":
+                test_all(
+                    args.n,
+                    DIFFICULTIES,
+                    record=args.record,
+                    ai=args.ai,
+                    enemy_ai=args.enemy_ai,
+                    workers=args.workers,
+                    timeout=args.timeout,
+                    cache=cache,
+                    telemetry=telemetry,
+                    pool=coordinator,
+                    archive=archive,
+                )
+
+            else:
+                if coordinator is None:
+                    pool = GamePool(args.workers, preload=(args.ai, args.enemy_ai))
+                else:
+                    pool = nullcontext(coordinator)
+                with pool as pool:
+                    test(
+                        args.n,
+                        args.difficulty,
+                        DIFFICULTIES,
+                        record=args.record,
+                        ai=args.ai,
+                        enemy_ai=args.enemy_ai,
+                        pool=pool,
+                        timeout=args.timeout,
+                        cache=cache,
+                        telemetry=telemetry,
+                        archive=archive,
+                    )
+
+        finally:
+            # local workers aren't daemons, so they have to be stopped either way
+            if coordinator is not None:
+                coordinator.close()
+            if cache is not None:
+                cache.close()
+
+        if telemetry is not None and telemetry.games:
+            print("\n" + telemetry.format())
+
+    # user has asked for a dataset of games to train on
+    elif args.command == "generate":
+        if args.difficulty not in DIFFICULTIES:
+            print(f"Unknown difficulty: {args.difficulty}")
+            list_modes()
+            return
+
+        from snake.generate import generate
+
+        try:
+            generate(
+                DIFFICULTIES[args.difficulty],
+                args.games,
+                args.output,
+                ai=args.ai,
+                enemy_ai=args.enemy_ai,
+                workers=args.workers,
+                shard_size=args.shard_size,
+                queue_size=args.queue,
+                egocentric=args.egocentric,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+    # user has asked to profile their AI
+    elif args.command == "profile":
+        if args.difficulty not in DIFFICULTIES:
             print(f"Unknown difficulty: {args.difficulty}")
             list_modes()
+            return
+
+        if args.games < 1:
+            parser.error("--games must be at least 1")
+
+        from snake.profiler import profile
+
+        profile(args.games, args.difficulty, DIFFICULTIES, output=args.output)
+
+    # user has asked to pit several AIs against each other
+    elif args.command == "tournament":
+        if args.difficulty not in DIFFICULTIES:
+            print(f"Unknown difficulty: {args.difficulty}")
+            list_modes()
+            return
+
+        from snake.tournament import tournament
+
+        tournament(
+            args.ais, args.difficulty, DIFFICULTIES, games=args.games, workers=args.workers
+        )
+
+    # user has asked which of two AIs is better
+    elif args.command == "compare":
+        if args.difficulty not in DIFFICULTIES:
+            print(f"Unknown difficulty: {args.difficulty}")
+            list_modes()
+            return
+
+        from snake.compare import compare
+
+        cache = None
+        if args.seed is not None and not args.no_cache:
+            from snake.cache import ResultCache
+
+            cache = ResultCache()
+
+        try:
+            compare(
+                args.old,
+                args.new,
+                args.difficulty,
+                DIFFICULTIES,
+                max_games=args.games,
+                batch=args.batch,
+                alpha=args.alpha,
+                enemy_ai=args.enemy_ai,
+                workers=args.workers,
+                cache=cache,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        finally:
+            if cache is not None:
+                cache.close()
+
+    # user has asked to map performance across configs
+    elif args.command == "sweep":
+        if args.base not in DIFFICULTIES:
+            print(f"Unknown difficulty: {args.base}")
+            list_modes()
+            return
+
+        from snake.sweep import PARAMS, parse_values, sweep
+
+        try:
+            ranges = {
+                param: parse_values(getattr(args, param))
+                for param in PARAMS
+                if getattr(args, param) is not None
+            }
+        except ValueError as e:
+            parser.error(str(e))
+
+        cache = None
+        if args.seed is not None and not args.no_cache:
+            from snake.cache import ResultCache
+
+            cache = ResultCache()
+
+        sweep(
+            DIFFICULTIES[args.base],
+            ranges,
+            games=args.games,
+            output=args.output,
+            ai=args.ai,
+            enemy_ai=args.enemy_ai,
+            workers=args.workers,
+            cache=cache,
+        )
+
+        if cache is not None:
+            cache.close()
+
+    # user has asked to play games for a coordinating snake test
+    elif args.command == "worker":
+        from snake.distributed import parse_address, work_many
+
+        try:
+            address = parse_address(args.address)
+        except ValueError as e:
+            parser.error(str(e))
+        work_many(address, workers=args.workers, retry=args.retry)
+
+    # user has asked to inspect recorded games
+    elif args.command == "replay":
+        from snake.replay import read_replays, format_board
+
+        replays = read_replays(args.file)
+
+        # without a game just summarise the archive
+        if args.game is None:
+            for i, replay in enumerate(replays):
+                game = replay.simulate()
+                print(
+                    f"  {i:<6} seed={replay.seed:<10} {replay.width}x{replay.height} "
+                    f"{replay.num_enemies} enemies  moves={game.moves:<5} "
+                    f"score={game.snakes[0].score}"
+                )
+            return
+
+        game = replays[args.game].simulate(args.tick)
+        print(f"Tick {game.moves}, score {game.snakes[0].score}")
+        print(format_board(game))
+
+    # user has asked to render recorded games without a window
+    elif args.command == "export":
+        from snake.raster import export_replays
+
+        counts = export_replays(
+            args.file,
+            args.out_dir,
+            games=args.games,
+            fmt=args.format,
+            cell_size=args.cell_size,
+            fps=args.fps,
+            workers=args.workers,
+        )
+        print(f"Exported {len(counts)} games ({sum(counts.values())} frames) to {args.out_dir}")
+
+    # user has asked how the engine scales
+    elif args.command == "bench":
+        from snake.bench import bench
 
-        else:
-            test(args.n, args.difficulty, DIFFICULTIES)
+        bench(args.ticks, ai=args.ai, enemy_ai=args.enemy_ai)
 
     # user has asked to list the difficulties
     elif args.command == "list":
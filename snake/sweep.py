@@ -0,0 +1,129 @@
+import csv
+import itertools
+import os
+import random
+
+from tqdm import tqdm
+
+from snake.ai import DEFAULT_AI, DEFAULT_ENEMY_AI
+from snake.pool import GamePool, GameTask
+
+# the config values a sweep can vary, in the order the grid is expanded
+PARAMS = ["width", "height", "num_enemies", "num_food", "max_moves"]
+
+COLUMNS = PARAMS + ["seed", "score", "moves", "best_enemy", "seconds", "ai_ms_per_move"]
+
+
+def parse_values(text):
+    """
+    Parses a sweep range: "a:b" or "a:b:step" (both ends included), "a,b,c" or "a".
+    """
+    try:
+        if ":" in text:
+            parts = [int(part) for part in text.split(":")]
+            if len(parts) not in (2, 3) or (len(parts) == 3 and parts[2] <= 0):
+                raise ValueError
+            start, stop, step = parts if len(parts) == 3 else parts + [1]
+            values = list(range(start, stop + 1, step))
+        else:
+            values = [int(part) for part in text.split(",")]
+    except ValueError:
+        raise ValueError(f"expected a:b[:step] or a,b,c, got {text!r}") from None
+
+    if not values:
+        raise ValueError(f"{text!r} is an empty range")
+    return values
+
+
+def expand(base, ranges):
+    """
+    Every combination of the swept values, other values coming from base.
+
+    Args:
+        base: The difficulty config the sweep starts from
+        ranges: Values to try for each swept parameter, by name
+    """
+    axes = [ranges.get(param, [base[param]]) for param in PARAMS]
+    return [dict(base, **dict(zip(PARAMS, values))) for values in itertools.product(*axes)]
+
+
+def fits(cfg):
+    # the snakes and food all need a cell of their own to start in
+    return cfg["num_enemies"] + 1 + cfg["num_food"] <= cfg["width"] * cfg["height"]
+
+
+def sweep(
+    base,
+    ranges,
+    games=10,
+    output="sweep.csv",
+    ai=DEFAULT_AI,
+    enemy_ai=DEFAULT_ENEMY_AI,
+    workers=None,
+    cache=None,
+):
+    """
+    Plays every cell of a grid of configs on a shared set of seeds.
+
+    Writes one row per game to a CSV file and prints the mean score and the
+    AI's time per move for each cell.
+
+    Args:
+        base: The difficulty config the unswept values come from
+        ranges: Values to try for each swept parameter, by name
+        games: Games per cell
+        output: CSV file to write
+        workers: Worker processes, defaults to one per core
+        cache: ResultCache to take already played games from
+    """
+    cells = expand(base, ranges)
+    skipped = [cfg for cfg in cells if not fits(cfg)]
+    cells = [cfg for cfg in cells if fits(cfg)]
+    if skipped:
+        print(f"Skipping {len(skipped)} configs with more snakes and food than cells")
+    if not cells:
+        raise ValueError("no config in the sweep fits on its board")
+
+    # every cell plays the same seeds, so differences come from the config alone
+    seeds = [random.getrandbits(32) for _ in range(games)]
+    tasks = [GameTask(cfg, seed, ai, enemy_ai) for cfg in cells for seed in seeds]
+
+    by_cell = {}
+    with GamePool(workers or os.cpu_count() or 1, preload=(ai, enemy_ai)) as pool:
+        results = cache.play(pool, tasks) if cache is not None else pool.play(tasks)
+        with open(output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for task, result in tqdm(
+                zip(tasks, results), total=len(tasks), desc="Sweeping", unit="game"
+            ):
+                ms_per_move = 1000 * result.ai_seconds / max(result.moves, 1)
+                writer.writerow(
+                    [task.cfg[param] for param in PARAMS]
+                    + [
+                        task.seed,
+                        result.score,
+                        result.moves,
+                        max(result.enemy_scores, default=""),
+                        f"{result.seconds:.4f}",
+                        f"{ms_per_move:.4f}",
+                    ]
+                )
+                key = tuple(task.cfg[param] for param in PARAMS)
+                by_cell.setdefault(key, []).append((result.score, ms_per_move))
+
+    swept = [param for param in PARAMS if param in ranges] or PARAMS
+    print(f"\nSweep of {len(cells)} configs ({games} games each), written to {output}")
+    print("=" * 60)
+    print("  " + " ".join(f"{param:>11}" for param in swept) + f" {'score':>8} {'ms/move':>9}")
+    for key, rows in by_cell.items():
+        cfg = dict(zip(PARAMS, key))
+        score = sum(score for score, _ in rows) / len(rows)
+        ms_per_move = sum(ms for _, ms in rows) / len(rows)
+        print(
+            "  " + " ".join(f"{cfg[param]:>11}" for param in swept)
+            + f" {score:>8.1f} {ms_per_move:>9.3f}"
+        )
+    print("=" * 60)
+
+    return by_cell
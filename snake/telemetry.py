@@ -0,0 +1,77 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from snake import logic
+
+
+def bucket(value):
+    """The power-of-two bucket a histogram value falls in (0 for 0 and below)"""
+    return 0 if value <= 0 else 1 << (int(value).bit_length() - 1)
+
+
+class Telemetry:
+    def __init__(self, games=0):
+        """
+        Counters and power-of-two histograms filled in by the engine's hooks.
+
+        Args:
+            games: How many games the counts cover
+        """
+        self.games = games
+        self.counters = Counter()
+        self.histograms = defaultdict(Counter)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def observe(self, name, value):
+        self.histograms[name][bucket(value)] += 1
+
+    def to_dict(self):
+        """A plain copy, cheap to send back from a worker process"""
+        return {
+            "games": self.games,
+            "counters": dict(self.counters),
+            "histograms": {name: dict(h) for name, h in self.histograms.items()},
+        }
+
+    def merge(self, data):
+        """Adds in the counts from another Telemetry's to_dict()"""
+        self.games += data["games"]
+        self.counters.update(data["counters"])
+        for name, histogram in data["histograms"].items():
+            self.histograms[name].update(histogram)
+
+    def format(self, width=30):
+        """Renders the counters (with their mean per game) and the histograms"""
+        games = self.games
+        lines = [f"Engine telemetry ({games} games)"]
+        if self.counters:
+            per_game = f" {'per game':>10}" if games else ""
+            lines.append(f"  {'counter':<34} {'total':>10}{per_game}")
+            for name in sorted(self.counters):
+                total = self.counters[name]
+                per_game = f" {total / games:>10.2f}" if games else ""
+                lines.append(f"  {name:<34} {total:>10}{per_game}")
+
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            most = max(histogram.values())
+            samples = sum(histogram.values())
+            lines.append(f"\n  {name} ({samples} samples)")
+            for low in sorted(histogram):
+                label = "0" if low == 0 else f"{low}-{2 * low - 1}" if low > 1 else "1"
+                bar = "#" * max(1, round(width * histogram[low] / most))
+                lines.append(f"    {label:>12} {histogram[low]:>9} {bar}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def recording():
+    """Turns the engine's hooks on for one game, yielding its Telemetry"""
+    previous = logic.telemetry
+    logic.telemetry = Telemetry(games=1)
+    try:
+        yield logic.telemetry
+    finally:
+        logic.telemetry = previous
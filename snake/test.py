@@ -1,57 +1,135 @@
-from tqdm import tqdm
+import random
+from contextlib import nullcontext
 
-from snake.logic import SnakeGame
-from snake.render import SnakeRenderer
+from tqdm import tqdm
 
-from myAI import myAI
-from examples.smartAI import smartAI as enemyAI
+from snake.ai import DEFAULT_AI, DEFAULT_ENEMY_AI
+from snake.pool import GamePool, GameTask, play_game
+from snake.replay import write_replays
 
 
 def run_no_viz(cfg):
-    game = SnakeGame(
-        width=cfg["width"],
-        height=cfg["height"],
-        num_enemies=cfg["num_enemies"],
-        max_moves=cfg["max_moves"],
-        num_food=cfg["num_food"],
-    )
+    return play_game(cfg).snakes[0].score
 
-    while not game.game_over:
-        for i in range(len(game.snakes)):
-            if game.snakes[i].isAlive:
-                state = game.getGameState(i)
-                turn = myAI(state) if i == 0 else enemyAI(state)
-                game.move_snake(i, turn)
 
-    return game.snakes[0].score
+def test(
+    n,
+    difficulty,
+    DIFFICULTIES,
+    record=None,
+    ai=DEFAULT_AI,
+    enemy_ai=DEFAULT_ENEMY_AI,
+    pool=None,
+    timeout=None,
+    cache=None,
+    telemetry=None,
+    archive=None,
+):
+    """
+    Test an AI on n games of a difficulty.
 
+    Args:
+        record: File to append replays of every game to
+        ai: The player's AI as "module:function"
+        enemy_ai: The enemies' AI as "module:function"
+        pool: GamePool to play the games in, defaults to this process
+        timeout: Seconds the player's AI gets per move, run out of process when set
+        cache: ResultCache to take already played games from
+        telemetry: Telemetry to add each game's engine counters to
+        archive: TickArchiveWriter to add every game's ticks to
+    """
+    # seeds are drawn up front so results don't depend on how games are scheduled
+    seeds = [random.getrandbits(32) for _ in range(n)]
+    tasks = [
+        GameTask(
+            DIFFICULTIES[difficulty],
+            seed,
+            ai,
+            enemy_ai,
+            record=bool(record) or archive is not None,
+            timeout=timeout,
+            telemetry=telemetry is not None,
+        )
+        for seed in seeds
+    ]
+
+    pool = pool or GamePool(preload=(ai, enemy_ai))
+    results = cache.play(pool, tasks) if cache is not None else pool.play(tasks)
 
-def test(n, difficulty, DIFFICULTIES):
     scores = []
+    replays = []
+    timeouts = 0
     with tqdm(total=n, desc=f"Testing {difficulty}", unit="game") as pbar:
-        for i in range(n):
-            score = run_no_viz(DIFFICULTIES[difficulty])
+        for result in results:
+            score = result.score
             scores.append(score)
+            timeouts += result.timeouts
+            if telemetry is not None:
+                telemetry.merge(result.telemetry)
+            if record:
+                replays.append(result.replay)
+            if archive is not None:
+                archive.append(result.replay)
             pbar.set_postfix({"last": score, "avg": f"{sum(scores)/len(scores):.1f}"})
             pbar.update(1)
 
+    if record:
+        write_replays(record, replays)
+
     avg = sum(scores) / len(scores)
     print(f"\nResults:")
     print(f"  Games: {len(scores)}")
     print(f"  Average: {avg:.1f}")
     print(f"  Min/Max: {min(scores)}/{max(scores)}")
+    if timeout is not None:
+        print(f"  Timeouts: {timeouts}")
     return avg
 
 
-def test_all(n, DIFFICULTIES):
-    """Test all difficulty levels"""
+def test_all(
+    n,
+    DIFFICULTIES,
+    record=None,
+    ai=DEFAULT_AI,
+    enemy_ai=DEFAULT_ENEMY_AI,
+    workers=1,
+    timeout=None,
+    cache=None,
+    telemetry=None,
+    pool=None,
+    archive=None,
+):
+    """
+    Test all difficulty levels, apart from the stress tests.
+
+    Takes the same arguments as test, workers being the size of the GamePool
+    made when no pool is given.
+    """
     results = {}
     print(f"\nTesting all difficulties ({n} games each)")
     print("=" * 40)
 
-    for diff in DIFFICULTIES:
-        results[diff] = test(n, diff, DIFFICULTIES)
-        print("")
+    # one pool for every difficulty keeps the workers' AIs warm throughout,
+    # and a pool that was passed in is left for the caller to close
+    owned = GamePool(workers, preload=(ai, enemy_ai)) if pool is None else nullcontext(pool)
+    with owned as pool:
+        for diff, cfg in DIFFICULTIES.items():
+            if cfg.get("stress"):
+                continue
+            results[diff] = test(
+                n,
+                diff,
+                DIFFICULTIES,
+                record=record,
+                ai=ai,
+                enemy_ai=enemy_ai,
+                pool=pool,
+                timeout=timeout,
+                cache=cache,
+                telemetry=telemetry,
+                archive=archive,
+            )
+            print("")
 
     print("\n" + "=" * 40)
     print("SUMMARY:")
@@ -0,0 +1,103 @@
+import os
+import random
+from dataclasses import dataclass
+
+from tqdm import tqdm
+
+from snake.pool import GamePool, GameTask
+
+
+@dataclass
+class Standing:
+    ai: str
+    points: float = 0.0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    player_games: int = 0
+    player_score: int = 0
+    enemy_games: int = 0
+    enemy_score: int = 0
+
+    @property
+    def games(self):
+        return self.player_games + self.enemy_games
+
+    def record(self, outcome):
+        self.points += outcome
+        if outcome == 1.0:
+            self.wins += 1
+        elif outcome == 0.5:
+            self.draws += 1
+        else:
+            self.losses += 1
+
+
+def schedule(specs, cfg, seeds):
+    """Every ordered pairing of distinct AIs, each played on every seed"""
+    return [
+        GameTask(cfg, seed, ai=player, enemy_ai=enemy)
+        for player in specs
+        for enemy in specs
+        if player != enemy
+        for seed in seeds
+    ]
+
+
+def tournament(specs, difficulty, DIFFICULTIES, games=10, workers=None):
+    """
+    Round-robin tournament between AIs given as "module:function" specs.
+
+    Each ordered pair plays `games` seeded games with the first AI as the player
+    and the second in every enemy seat. The player wins a game if it outscores
+    the best enemy, so both AIs get a win, draw or loss from every game.
+    """
+    cfg = DIFFICULTIES[difficulty]
+    if cfg["num_enemies"] < 1:
+        raise ValueError(f"{difficulty} has no enemies, pick a difficulty with some")
+    if len(set(specs)) != len(specs) or len(specs) < 2:
+        raise ValueError("a tournament needs at least two distinct AIs")
+
+    # every pairing plays the same seeds so the games are comparable
+    seeds = [random.getrandbits(32) for _ in range(games)]
+    tasks = schedule(specs, cfg, seeds)
+
+    standings = {spec: Standing(spec) for spec in specs}
+    with GamePool(workers or os.cpu_count() or 1, preload=specs) as pool:
+        with tqdm(total=len(tasks), desc="Tournament", unit="game") as pbar:
+            for task, result in zip(tasks, pool.play(tasks)):
+                player, enemy, score = task.ai, task.enemy_ai, result.score
+                best_enemy = max(result.enemy_scores)
+                outcome = 1.0 if score > best_enemy else 0.5 if score == best_enemy else 0.0
+
+                standings[player].record(outcome)
+                standings[player].player_games += 1
+                standings[player].player_score += score
+
+                standings[enemy].record(1.0 - outcome)
+                standings[enemy].enemy_games += 1
+                standings[enemy].enemy_score += best_enemy
+                pbar.update(1)
+
+    ranking = sorted(
+        standings.values(),
+        key=lambda s: (s.points, s.player_score / max(s.player_games, 1)),
+        reverse=True,
+    )
+
+    print(f"\nTournament on {difficulty} ({games} games per pairing)")
+    print("=" * 78)
+    print(
+        f"  {'#':<3} {'AI':<32} {'Pts':>6} {'W':>4} {'D':>4} {'L':>4} "
+        f"{'AsPlayer':>9} {'AsEnemy':>8}"
+    )
+    for rank, s in enumerate(ranking, start=1):
+        print(
+            f"  {rank:<3} {s.ai:<32} {s.points:>6.1f} "
+            f"{s.wins:>4} {s.draws:>4} {s.losses:>4} "
+            f"{s.player_score / max(s.player_games, 1):>9.1f} "
+            f"{s.enemy_score / max(s.enemy_games, 1):>8.1f}"
+        )
+    print("=" * 78)
+
+    return ranking
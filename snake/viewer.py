@@ -0,0 +1,122 @@
+import pyray as rl
+
+from snake.frame import FrameSnapshotter
+from snake.render import SnakeRenderer, fit_cell_size
+from snake.replay import KeyframeIndex
+
+# playback speeds, stepped through with the up and down arrows
+SPEEDS = [0.25, 0.5, 1, 2, 4, 8, 16, 32]
+
+
+class ReplayViewer:
+    def __init__(self, replay, moves_per_second=10, keyframe_interval=50):
+        """
+        Plays a recorded game with seeking, scrubbing and variable speed.
+
+        Args:
+            replay: The Replay to view
+            moves_per_second: Ticks per second at 1x speed
+            keyframe_interval: Ticks between the index's full checkpoints
+        """
+        self.index = KeyframeIndex(replay, keyframe_interval)
+        self.render = SnakeRenderer(
+            cell_size=fit_cell_size(replay.width, replay.height),
+            moves_per_second=moves_per_second,
+        )
+        self.moves_per_second = moves_per_second
+        self.snapshot = FrameSnapshotter()
+
+        # playback position in ticks, fractional between ticks while playing
+        self.position = 0.0
+        self.playing = True
+        self.speed = SPEEDS.index(1)
+
+        # frames around the playhead, so interpolation doesn't re-seek
+        self._frames = {}
+
+    @property
+    def num_ticks(self):
+        return self.index.num_ticks
+
+    def frame(self, tick):
+        """Gets the player's view after a tick"""
+        frame = self._frames.get(tick)
+        if frame is None:
+            if len(self._frames) >= 256:
+                self._frames.clear()
+            frame = self.snapshot(self.index.seek(tick).getGameState(0))
+            self._frames[tick] = frame
+        return frame
+
+    def seek(self, position):
+        self.position = float(max(0, min(position, self.num_ticks)))
+
+    def _timeline_bounds(self):
+        r = self.render
+        return r.padding, r.window_height - r.padding + 6, r.game_width, 8
+
+    def _handle_input(self):
+        if rl.is_key_pressed(rl.KEY_SPACE):
+            # playing from the end starts again from the beginning
+            if not self.playing and self.position >= self.num_ticks:
+                self.seek(0)
+            self.playing = not self.playing
+
+        # single steps pause playback
+        if rl.is_key_pressed(rl.KEY_RIGHT):
+            self.playing = False
+            self.seek(int(self.position) + 1)
+        if rl.is_key_pressed(rl.KEY_LEFT):
+            self.playing = False
+            self.seek(int(self.position) - (1 if self.position == int(self.position) else 0))
+
+        if rl.is_key_pressed(rl.KEY_UP):
+            self.speed = min(self.speed + 1, len(SPEEDS) - 1)
+        if rl.is_key_pressed(rl.KEY_DOWN):
+            self.speed = max(self.speed - 1, 0)
+
+        if rl.is_key_pressed(rl.KEY_HOME):
+            self.seek(0)
+        if rl.is_key_pressed(rl.KEY_END):
+            self.seek(self.num_ticks)
+
+        # dragging on the timeline scrubs to the tick under the mouse
+        if rl.is_mouse_button_down(rl.MOUSE_BUTTON_LEFT):
+            x, y, width, height = self._timeline_bounds()
+            mouse = rl.get_mouse_position()
+            if y - 6 <= mouse.y <= y + height + 6:
+                fraction = (mouse.x - x) / width
+                self.seek(round(fraction * self.num_ticks))
+
+    def _draw_timeline(self):
+        x, y, width, height = self._timeline_bounds()
+        progress = self.position / max(self.num_ticks, 1)
+
+        rl.draw_rectangle(x, y, width, height, rl.Color(0, 0, 0, 90))
+        rl.draw_rectangle(x, y, int(width * progress), height, self.render.WHITE)
+
+        state = "" if self.playing else "  paused"
+        text = f"{int(self.position)}/{self.num_ticks}  {SPEEDS[self.speed]}x{state}"
+        text_width = rl.measure_text(text, 20)
+        rl.draw_text(text, self.render.window_width - text_width - 30, 25, 20, self.render.WHITE)
+
+    def run(self):
+        """Opens the viewer window and plays until it is closed"""
+        render = self.render
+        render.show(self.frame(0))
+
+        while not rl.window_should_close():
+            self._handle_input()
+
+            if self.playing:
+                step = rl.get_frame_time() * self.moves_per_second * SPEEDS[self.speed]
+                self.seek(self.position + step)
+                if self.position >= self.num_ticks:
+                    self.playing = False
+
+            tick = int(self.position)
+            alpha = self.position - tick
+            next_frame = self.frame(tick + 1) if alpha > 0 else None
+            render.show(self.frame(tick), next_frame, alpha, overlay=self._draw_timeline)
+
+        render.close()
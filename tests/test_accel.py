@@ -0,0 +1,118 @@
+import importlib.util
+import random
+import sys
+from collections import deque
+
+import pytest
+
+from snake.logic import DIRECTIONS, Turn
+
+ACCEL_PATH = importlib.util.find_spec("snake.accel").origin
+
+
+@pytest.fixture(params=["python", "numba"])
+def accel(request, monkeypatch):
+    if request.param == "numba":
+        # snake.accel itself, as a compiled copy under another name would
+        # share (and clobber) its on-disk numba cache
+        pytest.importorskip("numba")
+        import snake.accel
+
+        if not snake.accel.JIT:
+            pytest.skip("SNAKE_NO_JIT is set")
+        return snake.accel
+
+    # a fresh copy of snake.accel, imported with the jit turned off
+    monkeypatch.setenv("SNAKE_NO_JIT", "1")
+    spec = importlib.util.spec_from_file_location("_accel_python", ACCEL_PATH)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, spec.name, module)
+    spec.loader.exec_module(module)
+    assert not module.JIT
+    return module
+
+
+def sorted_deque_search(width, height, head, direction, bounds, walls, targets):
+    # the search myAI ran before snake.accel: a deque kept sorted by distance,
+    # each cell inserted in front of the first one at least as far
+    def insert(queue, element):
+        for index, other in enumerate(queue):
+            if element[1] <= other[1]:
+                queue.insert(index, element)
+                return
+        queue.append(element)
+
+    queue = deque()
+    insert(queue, (head, bounds[head]))
+    visited = {head}
+
+    x, y = head
+    for turn in Turn:
+        dx, dy = DIRECTIONS[(direction + turn.value) % 4]
+        cell = (x + dx, y + dy)
+        if not (0 <= cell[0] < width and 0 <= cell[1] < height) or cell in walls:
+            continue
+        insert(queue, (cell, bounds.get(cell, 1)))
+        visited.add(cell)
+
+    while queue:
+        cell, distance = queue.popleft()
+        if cell in targets:
+            return distance
+
+        x, y = cell
+        for dx, dy in DIRECTIONS:
+            near = (x + dx, y + dy)
+            if not (0 <= near[0] < width and 0 <= near[1] < height):
+                continue
+            if near in walls or near in visited:
+                continue
+            insert(queue, (near, max(distance + 1, bounds.get(near, 0))))
+            visited.add(near)
+
+    return None
+
+
+def random_board(rng):
+    width, height = rng.randint(1, 12), rng.randint(1, 12)
+    cells = [(x, y) for y in range(height) for x in range(width)]
+    walls = {cell for cell in cells if rng.random() < rng.choice((0, 0.1, 0.3))}
+    free = [cell for cell in cells if cell not in walls] or [cells[0]]
+    walls.discard(free[0])
+
+    # bounds are positive on bodies (the head's included) and never more
+    # than a snake filling the board plus two
+    head = rng.choice(free)
+    bounds = {head: rng.randint(1, width * height + 2)}
+    for cell in rng.sample(free, rng.randint(0, len(free))):
+        bounds[cell] = rng.randint(1, width * height + 2)
+    targets = set(rng.sample(cells, rng.randint(0, min(len(cells), 6))))
+    return width, height, head, rng.randrange(4), bounds, walls, targets
+
+
+def to_grid(accel, width, height, values):
+    # a dict of cell: value, or a set of cells (set to 1), as a flat grid
+    if not isinstance(values, dict):
+        values = dict.fromkeys(values, 1)
+    board = accel.grid(width * height)
+    for (x, y), value in values.items():
+        board[y * width + x] = value
+    return board
+
+
+def test_nearest_target_matches_sorted_deque_search(accel):
+    rng = random.Random(46)
+    for _ in range(2000):
+        board = random_board(rng)
+        width, height, head, direction, bounds, walls, targets = board
+
+        found = accel.nearest_target(
+            width,
+            height,
+            head[1] * width + head[0],
+            direction,
+            to_grid(accel, width, height, bounds),
+            to_grid(accel, width, height, walls),
+            to_grid(accel, width, height, targets),
+        )
+        assert found == sorted_deque_search(*board), board
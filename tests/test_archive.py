@@ -0,0 +1,26 @@
+import numpy as np
+
+from snake.archive import NO_ACTION, TickArchive, TickArchiveWriter
+from snake.pool import GameTask, run_task
+from snake.snake import DIFFICULTIES
+
+SMART_AI = "examples.smartAI:smartAI"
+
+
+def test_sample_covers_the_whole_archive(tmp_path):
+    writer = TickArchiveWriter(tmp_path)
+    for seed in range(6):
+        task = GameTask(DIFFICULTIES["hard"], seed, ai=SMART_AI, record=True)
+        writer.append(run_task(task).replay)
+    archive = TickArchive(tmp_path)
+
+    n = 4000
+    sample = archive.sample(n, np.random.default_rng(48))
+    assert len(sample) == n
+    assert (sample["action"] != NO_ACTION).all()
+
+    # every game is picked about as often as it has ticks with an action
+    moves = archive.games["count"] - 1
+    picked = np.bincount(sample["game"], minlength=len(archive))
+    expected = n * moves / moves.sum()
+    assert (abs(picked - expected) < 5 * np.sqrt(expected) + 5).all(), picked
@@ -0,0 +1,60 @@
+import json
+import sqlite3
+
+import pytest
+
+import snake.logic
+from snake import cache
+from snake.cache import ResultCache
+from snake.pool import GamePool, GameTask, run_task
+from snake.snake import DIFFICULTIES
+
+SMART_AI = "examples.smartAI:smartAI"
+
+
+class CountingPool:
+    # plays in this process, without the timeout, counting what it's asked for
+    def __init__(self):
+        self.played = 0
+
+    def play(self, tasks):
+        for task in tasks:
+            self.played += 1
+            yield run_task(task._replace(timeout=None))
+
+
+@pytest.fixture
+def results(tmp_path):
+    with ResultCache(tmp_path / "results.sqlite") as results:
+        yield results
+
+
+def test_cached_games_are_not_played_again(results):
+    tasks = [GameTask(DIFFICULTIES["easy"], seed, ai=SMART_AI) for seed in range(3)]
+    with GamePool(preload=(SMART_AI,)) as pool:
+        first = list(results.play(pool, tasks))
+    pool = CountingPool()
+    second = list(results.play(pool, tasks))
+
+    assert pool.played == 0
+    assert [r.score for r in first] == [r.score for r in second]
+
+
+def test_games_with_a_timeout_are_never_cached(results):
+    cfg = DIFFICULTIES["easy"]
+    tasks = [GameTask(cfg, seed, ai=SMART_AI, timeout=1.0) for seed in range(2)]
+    pool = CountingPool()
+    list(results.play(pool, tasks))
+    list(results.play(pool, tasks))
+
+    assert pool.played == 4
+    assert results.db.execute("SELECT COUNT(*) FROM results").fetchone() == (0,)
+
+
+def test_project_modules_are_told_from_stdlib_and_third_party():
+    numpy = pytest.importorskip("numpy")
+    assert cache._is_project_module(snake.logic)
+    assert not cache._is_project_module(json)
+    assert not cache._is_project_module(sqlite3)
+    assert not cache._is_project_module(numpy)
+    assert not cache._is_project_module(numpy.linalg)
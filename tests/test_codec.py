@@ -0,0 +1,97 @@
+from dataclasses import replace
+
+import pytest
+
+from examples.smartAI import smartAI
+from snake.enemies import enemy_policy, tableAI
+from snake.logic import SnakeGame
+from snake.snake import DIFFICULTIES
+
+
+def new_game(difficulty, seed):
+    cfg = DIFFICULTIES[difficulty]
+    return SnakeGame(
+        width=cfg["width"],
+        height=cfg["height"],
+        num_enemies=cfg["num_enemies"],
+        max_moves=cfg["max_moves"],
+        num_food=cfg["num_food"],
+        seed=seed,
+    )
+
+
+def on_sorted_sets(ai):
+    # a decoded game's sets hold the same cells but may iterate in another
+    # order, so the AIs here see sets rebuilt from their sorted cells, making
+    # their moves depend only on what's on the board
+    def sorted_ai(state):
+        food, walls = set(sorted(state.food)), set(sorted(state.walls))
+        return ai(replace(state, food=food, walls=walls))
+
+    return sorted_ai
+
+
+sorted_smartAI = on_sorted_sets(smartAI)
+
+
+def play(game, ticks, ai=sorted_smartAI, enemy_turn=enemy_policy(sorted_smartAI)):
+    end = game.moves + ticks
+    while not game.game_over and game.moves < end:
+        for i in range(len(game.snakes)):
+            if game.snakes[i].isAlive:
+                turn = ai(game.getGameState(i)) if i == 0 else enemy_turn(game, i)
+                game.move_snake(i, turn)
+
+
+def summary(game):
+    # everything a game's future depends on, with sets compared as sets
+    return (
+        game.moves,
+        game.game_over,
+        [(s.id, s.direction, s.isAlive, s.score, list(s.body)) for s in game.snakes],
+        game.food,
+        game.walls,
+        game.invalid_wall_cache,
+        bytes(game.turns),
+        game.rng.getstate(),
+    )
+
+
+@pytest.mark.parametrize("difficulty", ["medium", "hard", "chaos"])
+@pytest.mark.parametrize("seed", range(8))
+def test_restored_game_continues_the_same(difficulty, seed):
+    game = new_game(difficulty, seed)
+    play(game, 20 + 7 * seed)
+    blob = game.to_bytes()
+
+    restored = SnakeGame.from_bytes(blob)
+    assert summary(restored) == summary(game)
+
+    play(game, 100)
+    play(restored, 100)
+    assert summary(restored) == summary(game)
+
+
+def test_restored_game_continues_the_same_into_another_game():
+    game = new_game("chaos", 1)
+    play(game, 40)
+    into = new_game("chaos", 2)
+    play(into, 70)
+
+    restored = SnakeGame.from_bytes(game.to_bytes(), into=into)
+    play(game, 100, ai=on_sorted_sets(tableAI))
+    play(restored, 100, ai=on_sorted_sets(tableAI))
+    assert summary(restored) == summary(game)
+
+
+def test_restored_game_continues_the_same_with_my_ai():
+    from myAI import myAI
+
+    ai = on_sorted_sets(myAI)
+    game = new_game("hard", 3)
+    play(game, 40, ai=ai)
+    restored = SnakeGame.from_bytes(game.to_bytes())
+
+    play(game, 40, ai=ai)
+    play(restored, 40, ai=ai)
+    assert summary(restored) == summary(game)
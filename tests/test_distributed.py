@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from snake.distributed import Coordinator, work
+from snake.pool import GameTask, run_task
+from snake.snake import DIFFICULTIES
+
+SMART_AI = "examples.smartAI:smartAI"
+
+
+def tasks(n):
+    return [GameTask(DIFFICULTIES["easy"], seed, ai=SMART_AI) for seed in range(n)]
+
+
+def start_worker(address):
+    thread = threading.Thread(target=work, args=(address, 5.0), daemon=True)
+    thread.start()
+    return thread
+
+
+def test_workers_play_the_same_games_as_run_task():
+    with Coordinator(unit_size=2) as coordinator:
+        worker = start_worker(coordinator.address)
+        results = list(coordinator.play(tasks(5)))
+    worker.join(10)
+
+    expected = [run_task(task) for task in tasks(5)]
+    assert [(r.seed, r.score, r.moves) for r in results] == [
+        (r.seed, r.score, r.moves) for r in expected
+    ]
+
+
+def test_play_gives_up_without_workers():
+    with Coordinator(idle_timeout=1.0) as coordinator:
+        with pytest.raises(RuntimeError, match="no worker"):
+            list(coordinator.play(tasks(2)))
+
+
+def test_play_gives_up_when_every_worker_refuses():
+    with Coordinator(idle_timeout=60.0) as coordinator:
+        # as if the workers' sources differed from ours
+        coordinator._fingerprint_cache[(SMART_AI, tasks(1)[0].enemy_ai)] = ["elsewhere"]
+        worker = start_worker(coordinator.address)
+        with pytest.raises(RuntimeError, match="refused"):
+            list(coordinator.play(tasks(2)))
+    worker.join(10)
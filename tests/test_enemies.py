@@ -0,0 +1,33 @@
+import pytest
+
+from examples.smartAI import smartAI
+from snake.enemies import smart_turn, tableAI
+from snake.logic import SnakeGame
+from snake.snake import DIFFICULTIES
+
+
+@pytest.mark.parametrize("difficulty", ["hard", "chaos"])
+@pytest.mark.parametrize("seed", range(4))
+def test_table_policies_make_smartAIs_moves(difficulty, seed):
+    cfg = DIFFICULTIES[difficulty]
+    game = SnakeGame(
+        width=cfg["width"],
+        height=cfg["height"],
+        num_enemies=cfg["num_enemies"],
+        max_moves=cfg["max_moves"],
+        num_food=cfg["num_food"],
+        seed=seed,
+    )
+
+    decisions = 0
+    while not game.game_over:
+        for i in range(len(game.snakes)):
+            if not game.snakes[i].isAlive:
+                continue
+            state = game.getGameState(i)
+            turn = smartAI(state)
+            if i > 0:
+                assert tableAI(state) == smart_turn(game, i) == turn
+                decisions += 1
+            game.move_snake(i, turn)
+    assert decisions
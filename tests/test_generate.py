@@ -0,0 +1,30 @@
+import random
+
+import numpy as np
+
+from snake.generate import generate
+from snake.snake import DIFFICULTIES
+
+DUMB_AI = "examples.dumbAI:dumbAI"
+
+
+def shards(path):
+    return [dict(np.load(shard)) for shard in sorted(path.glob("shard_*.npz"))]
+
+
+def test_seeded_datasets_are_the_same_whatever_the_worker_count(tmp_path):
+    datasets = []
+    for workers in (3, 2):
+        random.seed(49)
+        output = tmp_path / str(workers)
+        generate(
+            DIFFICULTIES["hard"], 8, output, ai=DUMB_AI, workers=workers, shard_size=20
+        )
+        datasets.append(shards(output))
+
+    first, second = datasets
+    assert len(first) == len(second) > 1
+    for a, b in zip(first, second):
+        assert a.keys() == b.keys()
+        for key in a:
+            np.testing.assert_array_equal(a[key], b[key])
@@ -0,0 +1,24 @@
+import random
+
+from snake.pool import GameTask, run_task
+from snake.snake import DIFFICULTIES
+
+DUMB_AI = "examples.dumbAI:dumbAI"
+
+
+def test_random_ais_play_the_same_on_the_same_seed():
+    task = GameTask(DIFFICULTIES["hard"], 7, ai=DUMB_AI, enemy_ai=DUMB_AI, record=True)
+    first, second = run_task(task), run_task(task)
+    assert first.replay.turns == second.replay.turns
+    assert (first.score, first.enemy_scores) == (second.score, second.enemy_scores)
+
+
+def test_run_task_leaves_the_callers_random_alone():
+    random.seed(1)
+    expected = [random.random() for _ in range(3)]
+
+    random.seed(1)
+    drawn = [random.random()]
+    run_task(GameTask(DIFFICULTIES["hard"], 7, ai=DUMB_AI, enemy_ai=DUMB_AI))
+    drawn += [random.random() for _ in range(2)]
+    assert drawn == expected
@@ -0,0 +1,26 @@
+from dataclasses import replace
+
+import pytest
+
+from examples.smartAI import smartAI
+from snake.pool import GameTask, run_task
+from snake.snake import DIFFICULTIES
+
+
+def sorted_smartAI(state):
+    # smartAI on sets rebuilt from their sorted cells, as the child's decoded
+    # sets may iterate in another order than the game's
+    food, walls = set(sorted(state.food)), set(sorted(state.walls))
+    return smartAI(replace(state, food=food, walls=walls))
+
+
+@pytest.mark.parametrize("ai", [f"{__name__}:sorted_smartAI", "examples.dumbAI:dumbAI"])
+@pytest.mark.parametrize("difficulty", ["hard", "chaos"])
+def test_timed_ais_play_as_they_do_in_process(ai, difficulty):
+    task = GameTask(DIFFICULTIES[difficulty], 5, ai=ai, record=True)
+    local = run_task(task)
+    remote = run_task(task._replace(timeout=30.0))
+
+    assert remote.timeouts == 0
+    assert remote.replay.turns == local.replay.turns
+    assert remote.score == local.score